@@ -1,56 +1,190 @@
 """Модуль обработки действий правил."""
 
+import importlib
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from tracing import NULL_SINK
+
+# Коды MBTI по 4-битному индексу: биты E/I, S/N, T/F, J/P (1 - первая буква)
+MBTI_CODES = tuple(
+    ('E' if i & 8 else 'I') + ('S' if i & 4 else 'N') + ('T' if i & 2 else 'F') + ('J' if i & 1 else 'P')
+    for i in range(16)
+)
+MBTI_INDEX = {code: i for i, code in enumerate(MBTI_CODES)}
+
+# Карьерные рекомендации по умолчанию; раздел career_recommendations
+# базы знаний имеет приоритет (см. career_table)
+DEFAULT_CAREERS = {
+    'INTJ': 'Научные исследования, IT-архитектура, стратегическое планирование',
+    'INFJ': 'Психология, коучинг, социальная работа',
+    'ENTP': 'Предпринимательство, маркетинг, консалтинг',
+    'ENFJ': 'Обучение, управление, общественная деятельность',
+    'ISTJ': 'Бухгалтерия, администрирование, логистика',
+    'ISFP': 'Дизайн, искусство, музыка',
+    'ESTP': 'Продажи, спорт, мероприятия',
+    'ESFJ': 'Медицина, образование, уход за людьми',
+    'ISTP': 'Технические специальности, механика',
+    'ISFJ': 'Медицина, библиотечное дело, архивирование',
+    'INTP': 'Программирование, научная работа',
+    'INFP': 'Психология, писательство, искусство',
+    'ENTJ': 'Менеджмент, политика, юриспруденция',
+    'ENFP': 'Маркетинг, PR, творческие профессии',
+    'ESTJ': 'Управление, организация, контроль',
+    'ESFP': 'Развлечения, туризм, сервис'
+}
+CAREER_FALLBACK = 'Разнообразные профессии, подходящие вашему типу личности'
+
+
+def career_table(career_recommendations: Mapping) -> Tuple[str, ...]:
+    """Строит 16-элементную таблицу рекомендаций по индексу MBTI."""
+    table = []
+    for code in MBTI_CODES:
+        rec = career_recommendations.get(code)
+        if rec is None:
+            rec = DEFAULT_CAREERS.get(code, CAREER_FALLBACK)
+        elif not isinstance(rec, str):
+            rec = ', '.join(rec)
+        table.append(rec)
+    return tuple(table)
+
+
+# Реализации пользовательских действий: имя из custom_actions[...]['implementation']
+# -> функция (handler, action). Пополняется декоратором register_action.
+IMPLEMENTATIONS: Dict[str, Callable] = {}
+# Факты, которые читает реализация помимо условий правила (для поддержки
+# истинности); None - неизвестно, зависимость от всех фактов
+READS: Dict[str, Optional[Tuple[str, ...]]] = {}
+
+
+def register_action(name: str, reads: Optional[Iterable[str]] = None):
+    """Декоратор: регистрирует реализацию пользовательского действия."""
+    def register(func: Callable) -> Callable:
+        IMPLEMENTATIONS[name] = func
+        READS[name] = tuple(reads) if reads is not None else None
+        return func
+    return register
+
+
+def resolve_implementation(name: str) -> Callable:
+    """Находит реализацию по имени в реестре или по пути 'модуль:функция'."""
+    if name in IMPLEMENTATIONS:
+        return IMPLEMENTATIONS[name]
+    if ':' in name:
+        module, _, attr = name.partition(':')
+        try:
+            func = getattr(importlib.import_module(module), attr)
+        except (ImportError, AttributeError):
+            func = None
+        if callable(func):
+            return func
+    raise ValueError(f"Неизвестная реализация действия: {name}")
+
+
+def action_reads(custom_actions: Mapping) -> Dict[str, Optional[Tuple[str, ...]]]:
+    """Тип пользовательского действия -> читаемые им факты (поле reads или реестр)."""
+    reads = {}
+    for atype, spec in custom_actions.items():
+        if 'reads' in spec:
+            reads[atype] = tuple(spec['reads'])
+        else:
+            reads[atype] = READS.get(spec['implementation'])
+    return reads
+
+
+def build_dispatch(custom_actions: Mapping, rules: Iterable[Mapping]) -> Dict[str, Callable]:
+    """Строит таблицу тип действия -> обработчик и проверяет действия правил."""
+    dispatch = dict(BUILTIN_ACTIONS)
+    for atype, spec in custom_actions.items():
+        dispatch[atype] = resolve_implementation(spec['implementation'])
+
+    for rule in rules:
+        for action in rule['actions']:
+            if action['type'] not in dispatch:
+                raise ValueError(f"Правило {rule['id']}: неизвестный тип действия {action['type']}")
+    return dispatch
+
 
 class ActionHandler:
     """Обработчик действий правил."""
 
-    def __init__(self, memory):
+    def __init__(self, memory, trace=NULL_SINK):
         self.memory = memory
+        self.trace = trace
+        self.tracing = trace.enabled
+        # Таблица диспетчеризации строится при загрузке базы знаний
+        self.dispatch = memory.kb.dispatch
+        # Текущее событие трассировки (None, если трассировка выключена)
+        self._event = None
+        self.cycle = 0  # цикл последнего выполненного действия
+        if self.tracing:
+            memory.listeners += (self._on_fact,)
 
-    def execute(self, action: dict):
-        """Выполняет действие в зависимости от типа."""
-        atype = action['type']
+    def _on_fact(self, name: str):
+        # Отменённого факта в хранилище уже нет: его значение - None
+        value = self.memory.facts.get(name)
+        if self._event is not None:
+            self._event['delta'][name] = value
+        elif value is None:
+            # Отмена вне действия (retract, change_answer) - отдельное событие
+            self.trace.emit({'cycle': self.cycle, 'rule': None, 'action': 'retract',
+                             'delta': {name: None}, 'message': None})
 
-        if atype == 'assert':
-            self.memory.facts[action['fact']] = action['value']
-            print(f"  [Факт: {action['fact']} = {action['value']}]")
+    def _say(self, text: str):
+        """Прикрепляет сообщение к текущему событию трассировки."""
+        if self._event is not None:
+            self._event['message'] = text
 
-        elif atype == 'ask_user':
-            qid = action['question']
-            fact_name = action['fact']
-            if qid not in self.memory.asked:
-                ans = self.memory.ask_question(qid)
-                self.memory.facts[fact_name] = ans
-                self.memory.asked.add(qid)
-                print(f"  [Ответ: {fact_name} = {ans}]")
+    def execute(self, action: dict, rule_id: Optional[str] = None, cycle: int = 0):
+        """Выполняет действие через таблицу обработчиков."""
+        if not self.tracing:
+            self.dispatch[action['type']](self, action)
+            return
 
-        elif atype == 'calculate_mbti_type':
-            self._calculate_mbti()
+        self.cycle = cycle
+        self._event = {'cycle': cycle, 'rule': rule_id, 'action': action['type'],
+                       'delta': {}, 'message': None}
+        try:
+            self.dispatch[action['type']](self, action)
+        finally:
+            event, self._event = self._event, None
+        if event['delta'] or event['message']:
+            self.trace.emit(event)
 
-        elif atype == 'generate_personality_report':
-            self._generate_report()
+    def _assert(self, action: dict):
+        """Добавляет факт в память."""
+        self.memory.set_fact(action['fact'], action['value'])
+        self._say(f"  [Факт: {action['fact']} = {action['value']}]")
 
-        elif atype == 'generate_career_recommendations':
-            self._generate_career_recommendations()
+    def _ask_user(self, action: dict):
+        """Задаёт вопрос, если он ещё не задавался."""
+        qid = action['question']
+        fact_name = action['fact']
+        if qid in self.memory.kb.skipped_questions:
+            return
+        if qid not in self.memory.asked:
+            ans = self.memory.ask_question(qid)
+            self.memory.set_answer(fact_name, ans)
+            self.memory.asked.add(qid)
+            self._say(f"  [Ответ: {fact_name} = {ans}]")
 
-        elif atype == 'generate_communication_recommendations':
-            self._generate_communication_recommendations()
-
-        elif atype == 'generate_growth_recommendations':
-            self._generate_growth_recommendations()
-
-    def _calculate_mbti(self):
+    @register_action('combine_categories_to_mbti',
+                     reads=('energy_source', 'information_processing', 'decision_making', 'lifestyle'))
+    def _calculate_mbti(self, action: dict):
         """Вычисляет тип MBTI."""
-        e = 'E' if self.memory.facts.get('energy_source') == 'extraversion' else 'I'
-        s = 'S' if self.memory.facts.get('information_processing') == 'sensing' else 'N'
-        t = 'T' if self.memory.facts.get('decision_making') == 'thinking' else 'F'
-        j = 'J' if self.memory.facts.get('lifestyle') == 'judging' else 'P'
+        facts = self.memory.facts
+        idx = ((facts.get('energy_source') == 'extraversion') << 3
+               | (facts.get('information_processing') == 'sensing') << 2
+               | (facts.get('decision_making') == 'thinking') << 1
+               | (facts.get('lifestyle') == 'judging'))
 
-        mbti = e + s + t + j
-        self.memory.facts['mbti_type'] = mbti
-        print(f"  [Рассчитан тип MBTI: {mbti}]")
+        mbti = MBTI_CODES[idx]
+        self.memory.set_fact('mbti_type', mbti)
+        self._say(f"  [Рассчитан тип MBTI: {mbti}]")
 
-    def _generate_report(self):
+    @register_action('combine_all_analyses',
+                     reads=('mbti_type', 'diagnosis', 'extraversion_analysis', 'openness_analysis',
+                            'conscientiousness_analysis', 'emotional_analysis'))
+    def _generate_report(self, action: dict):
         """Генерирует отчет личности."""
         parts = []
 
@@ -74,37 +208,22 @@ class ActionHandler:
             parts.append("Черты личности:")
             parts.extend([f"  - {item}" for item in big5])
 
-        self.memory.facts['integrated_report'] = "\n".join(parts)
-        print("  [Создан отчет]")
+        self.memory.set_fact('integrated_report', "\n".join(parts))
+        self._say("  [Создан отчет]")
 
-    def _generate_career_recommendations(self):
+    @register_action('map_mbti_to_careers', reads=('mbti_type',))
+    def _generate_career_recommendations(self, action: dict):
         """Генерирует карьерные рекомендации."""
         mbti = self.memory.facts.get('mbti_type')
         if mbti:
-            recommendations = {
-                'INTJ': 'Научные исследования, IT-архитектура, стратегическое планирование',
-                'INFJ': 'Психология, коучинг, социальная работа',
-                'ENTP': 'Предпринимательство, маркетинг, консалтинг',
-                'ENFJ': 'Обучение, управление, общественная деятельность',
-                'ISTJ': 'Бухгалтерия, администрирование, логистика',
-                'ISFP': 'Дизайн, искусство, музыка',
-                'ESTP': 'Продажи, спорт, мероприятия',
-                'ESFJ': 'Медицина, образование, уход за людьми',
-                'ISTP': 'Технические специальности, механика',
-                'ISFJ': 'Медицина, библиотечное дело, архивирование',
-                'INTP': 'Программирование, научная работа',
-                'INFP': 'Психология, писательство, искусство',
-                'ENTJ': 'Менеджмент, политика, юриспруденция',
-                'ENFP': 'Маркетинг, PR, творческие профессии',
-                'ESTJ': 'Управление, организация, контроль',
-                'ESFP': 'Развлечения, туризм, сервис'
-            }
-
-            rec = recommendations.get(mbti, 'Разнообразные профессии, подходящие вашему типу личности')
-            self.memory.facts['career_recommendation'] = rec
-            print(f"  [Созданы карьерные рекомендации]")
-
-    def _generate_communication_recommendations(self):
+            idx = MBTI_INDEX.get(mbti)
+            rec = self.memory.kb.careers[idx] if idx is not None else CAREER_FALLBACK
+            self.memory.set_fact('career_recommendation', rec)
+            self._say(f"  [Созданы карьерные рекомендации]")
+
+    @register_action('suggest_communication_strategies',
+                     reads=('personality_category', 'perception_category'))
+    def _generate_communication_recommendations(self, action: dict):
         """Генерирует рекомендации по общению."""
         e_type = self.memory.facts.get('personality_category')
         p_type = self.memory.facts.get('perception_category')
@@ -119,10 +238,11 @@ class ActionHandler:
         else:
             comm += '. Ориентируетесь на идеи и общую картину в общении.'
 
-        self.memory.facts['communication_recommendation'] = comm
-        print("  [Созданы рекомендации по общению]")
+        self.memory.set_fact('communication_recommendation', comm)
+        self._say("  [Созданы рекомендации по общению]")
 
-    def _generate_growth_recommendations(self):
+    @register_action('suggest_growth_areas', reads=('mbti_type', 'emotional_stability'))
+    def _generate_growth_recommendations(self, action: dict):
         """Генерирует рекомендации для роста."""
         mbti = self.memory.facts.get('mbti_type', '')
         stability = self.memory.facts.get('emotional_stability', 3)
@@ -141,5 +261,12 @@ class ActionHandler:
         if stability < 3:
             rec.append('Работайте над эмоциональной устойчивостью')
 
-        self.memory.facts['growth_recommendation'] = '; '.join(rec) if rec else 'Развивайте сильные стороны вашего типа'
-        print("  [Созданы рекомендации для роста]")
\ No newline at end of file
+        self.memory.set_fact('growth_recommendation', '; '.join(rec) if rec else 'Развивайте сильные стороны вашего типа')
+        self._say("  [Созданы рекомендации для роста]")
+
+
+# Встроенные действия, доступные любой базе знаний
+BUILTIN_ACTIONS = {
+    'assert': ActionHandler._assert,
+    'ask_user': ActionHandler._ask_user,
+}
@@ -0,0 +1,140 @@
+"""Агенда: очередь активаций со стратегиями разрешения конфликтов."""
+
+import heapq
+from typing import Callable, Iterable, Tuple, Union
+
+INF = float('inf')
+
+
+def by_order(agenda, idx: int) -> tuple:
+    """По порядку следования правил в базе знаний."""
+    return (idx,)
+
+
+def by_salience(agenda, idx: int) -> tuple:
+    """Сначала правила с большим приоритетом (salience)."""
+    return (-agenda.salience[idx], idx)
+
+
+def by_recency(agenda, idx: int) -> tuple:
+    """Сначала правила, опирающиеся на самые свежие факты."""
+    return (-max(agenda.stamps(idx), default=0), idx)
+
+
+def by_specificity(agenda, idx: int) -> tuple:
+    """Сначала правила с большим числом условий."""
+    return (-len(agenda.compiled[idx]), idx)
+
+
+def by_lex(agenda, idx: int) -> tuple:
+    """LEX: лексикографическое сравнение меток времени фактов, затем специфичность."""
+    recency = tuple(sorted((-s for s in agenda.stamps(idx))))
+    return recency + (INF, -len(agenda.compiled[idx]), idx)
+
+
+def by_mea(agenda, idx: int) -> tuple:
+    """MEA: свежесть факта первого условия, затем как LEX."""
+    first = agenda.stamps(idx)[:1] or (0,)
+    return (-first[0],) + by_lex(agenda, idx)
+
+
+STRATEGIES = {
+    'order': by_order,
+    'salience': by_salience,
+    'recency': by_recency,
+    'specificity': by_specificity,
+    'lex': by_lex,
+    'mea': by_mea,
+}
+
+Strategy = Callable[['Agenda', int], tuple]
+
+# Стратегии, которым не нужны метки времени фактов
+UNSTAMPED = (by_order, by_salience, by_specificity)
+
+
+class Agenda:
+    """Очередь активаций на куче с рефракцией.
+
+    Рефракция: правило не срабатывает повторно на том же наборе значений
+    фактов, упомянутых в его условиях.
+    """
+
+    def __init__(self, kb, memory, strategy: Union[str, Strategy] = 'salience',
+                 refraction: bool = True):
+        if isinstance(strategy, str):
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Неизвестная стратегия разрешения конфликтов: {strategy}")
+            strategy = STRATEGIES[strategy]
+
+        self.memory = memory
+        self.compiled = kb.compiled
+        self.strategy = strategy
+        self.refraction = refraction
+        self.salience = kb.salience
+        # Факты из условий правила без повторов, в порядке упоминания
+        self.facts_of = kb.facts_of
+        self.slots_of = kb.slots_of
+        # Рефракция: номер правила -> набор значений, на котором оно сработало
+        # (множество наборов, если правило срабатывало на разных значениях)
+        self.fired = {}
+        self.heap = []
+        self.last = None  # последняя извлечённая активация: (номер, значения)
+        if memory.stamps is None and strategy not in UNSTAMPED:
+            memory.stamps = {}
+
+    def stamps(self, idx: int) -> Tuple[int, ...]:
+        """Метки времени фактов, на которые опирается правило."""
+        stamps = self.memory.stamps
+        return tuple(stamps.get(name, 0) for name in self.facts_of[idx])
+
+    def has_fired(self, idx: int, values: tuple) -> bool:
+        """Срабатывало ли правило на этом наборе значений."""
+        seen = self.fired.get(idx)
+        if isinstance(seen, set):
+            return values in seen
+        return seen == values
+
+    def push(self, idx: int) -> bool:
+        """Добавляет активацию правила; False, если она отсечена рефракцией."""
+        slots = self.memory.facts.slots
+        values = tuple(slots[slot] for slot in self.slots_of[idx])
+        if self.refraction and self.has_fired(idx, values):
+            return False
+        heapq.heappush(self.heap, (self.strategy(self, idx), idx, values))
+        return True
+
+    def pop(self) -> int:
+        """Извлекает номер правила с наивысшим приоритетом."""
+        _, idx, values = heapq.heappop(self.heap)
+        if self.refraction:
+            seen = self.fired.get(idx)
+            if seen is None:
+                self.fired[idx] = values
+            elif isinstance(seen, set):
+                seen.add(values)
+            else:
+                self.fired[idx] = {seen, values}
+            self.last = (idx, values)
+        return idx
+
+    def interrupt(self):
+        """Срабатывание прервано (нет ответа на вопрос): правило сможет
+        сработать снова, а очередь соберётся заново на следующем цикле."""
+        if self.last is not None:
+            idx, values = self.last
+            seen = self.fired.get(idx)
+            if isinstance(seen, set) and len(seen) > 1:
+                seen.discard(values)
+            else:
+                self.fired.pop(idx, None)
+            self.last = None
+        self.heap.clear()
+
+    def forget(self, rules: Iterable[int]):
+        """Снимает рефракцию с правил: после отмены фактов они могут сработать снова."""
+        for idx in rules:
+            self.fired.pop(idx, None)
+
+    def __len__(self) -> int:
+        return len(self.heap)
@@ -0,0 +1,99 @@
+"""Пакетный (неинтерактивный) режим экспертной системы.
+
+Пример запуска:
+    python api.py answers.jsonl results.jsonl
+
+Каждая строка входа - JSON-объект с ответами на вопросы из lab.json,
+каждая строка выхода - итоговые факты и отчет либо сообщение об ошибке.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Optional, Union
+
+from cache import OutcomeCache
+from engine import RuleEngine
+from artifact import load_knowledge_base
+from knowledge_base import KnowledgeBase
+from profiler import RuleProfiler
+
+
+def evaluate(answers: Dict, kb: Union[str, KnowledgeBase] = 'lab.json', **options) -> Dict:
+    """Проводит анализ по готовым ответам и возвращает итоговые факты."""
+    if not isinstance(answers, dict):
+        raise ValueError(f"Ответы должны быть JSON-объектом, а не {type(answers).__name__}")
+    engine = RuleEngine(kb, answers=answers, verbose=False, **options)
+    return dict(engine.infer())
+
+
+def score_line(line: str, kb: KnowledgeBase, cache: Optional[OutcomeCache] = None,
+               profiler: Optional[RuleProfiler] = None) -> Optional[Dict]:
+    """Анализирует одну JSONL-строку ответов; None для пустой строки."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        answers = json.loads(line)
+        if cache is not None:
+            facts = cache.evaluate(answers)
+        else:
+            facts = evaluate(answers, kb, profiler=profiler)
+    except ValueError as e:
+        return {'error': str(e)}
+    return {'facts': facts, 'report': facts.get('integrated_report')}
+
+
+def evaluate_stream(lines, out, kb: Union[str, KnowledgeBase] = 'lab.json',
+                    cache: Optional[OutcomeCache] = None,
+                    profiler: Optional[RuleProfiler] = None) -> int:
+    """Обрабатывает поток JSONL-ответов; возвращает число успешных анализов."""
+    if isinstance(kb, str):
+        kb = load_knowledge_base(kb)
+
+    done = 0
+    for line in lines:
+        record = score_line(line, kb, cache, profiler)
+        if record is None:
+            continue
+        if 'facts' in record:
+            done += 1
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный анализ личности по JSONL-ответам")
+    parser.add_argument('input', nargs='?', default='-', help="файл с ответами (по умолчанию stdin)")
+    parser.add_argument('output', nargs='?', default='-', help="файл результатов (по умолчанию stdout)")
+    parser.add_argument('--rules', default='lab.json', help="база знаний")
+    parser.add_argument('--cache', type=int, default=0, metavar='N',
+                        help="кэшировать итоги для N последних векторов ответов")
+    parser.add_argument('--profile', choices=('text', 'prometheus'),
+                        help="вывести в stderr счётчики по правилам (без --cache)")
+    args = parser.parse_args()
+    if args.profile and args.cache > 0:
+        parser.error("--profile нельзя совмещать с --cache: попадания в кэш правил не выполняют")
+    cache = OutcomeCache(args.rules, args.cache) if args.cache > 0 else None
+    kb = cache.kb if cache else load_knowledge_base(args.rules)
+    profiler = RuleProfiler(kb) if args.profile else None
+
+    src = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    dst = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        evaluate_stream(src, dst, kb, cache, profiler)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    if cache is not None:
+        st = cache.stats()
+        print(f"кэш: попаданий {st['hits']}, промахов {st['misses']}", file=sys.stderr)
+    if profiler is not None:
+        text = profiler.report() if args.profile == 'text' else profiler.prometheus()
+        print(text, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
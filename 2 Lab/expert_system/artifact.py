@@ -0,0 +1,155 @@
+"""Скомпилированная база знаний: готовое состояние KnowledgeBase в файле.
+
+Пример запуска:
+    python artifact.py lab.json          # пишет lab.kbc рядом с lab.json
+    python main.py compile lab.json      # то же из точки входа
+
+Файл содержит проверенную базу знаний со скомпилированными условиями,
+индексами и планом опроса (pickle через KnowledgeBase.__reduce__), так
+что при запуске не нужно разбирать JSON и заново всё выводить.
+
+Формат (little-endian): заголовок HEADER, затем pickle базы знаний.
+В заголовке - размер и время изменения исходного файла, его sha256 и
+sha256 самих данных. Файл считается устаревшим, если исходник
+изменился (sha256 сверяется, только когда не совпали размер или время),
+если сменилась версия формата или код, который строит базу знаний
+(модули COMPILER: план опроса, таблица профессий, индексы и т. п. не
+хранятся в исходнике); тогда load_knowledge_base читает JSON.
+"""
+
+import argparse
+import gc
+import hashlib
+import os
+import pickle
+import struct
+import sys
+import time
+from typing import Dict, Optional
+
+import actions
+import conditions
+import factstore
+import knowledge_base
+import loader
+import planner
+from knowledge_base import KnowledgeBase
+
+MAGIC = b'ESKB'
+VERSION = 2
+SUFFIX = '.kbc'
+# magic, версия, sha256 кода компилятора, размер и mtime исходника,
+# sha256 исходника, sha256 данных
+HEADER = struct.Struct('<4sH32sQq32s32s')
+# Модули, чей код определяет содержимое скомпилированной базы
+COMPILER = (knowledge_base, actions, conditions, factstore, loader, planner)
+
+
+def compiler_digest() -> bytes:
+    """sha256 исходников модулей COMPILER."""
+    sha = hashlib.sha256()
+    for module in COMPILER:
+        with open(module.__file__, 'rb') as f:
+            sha.update(f.read())
+    return sha.digest()
+
+
+CODE = compiler_digest()
+
+
+def artifact_path(source: str) -> str:
+    """Путь скомпилированной базы для исходного файла: lab.json -> lab.kbc."""
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def file_digest(path: str) -> str:
+    """sha256 файла, читаемого кусками."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def write_artifact(kb: KnowledgeBase, path: Optional[str] = None) -> Dict[str, int]:
+    """Сохраняет базу знаний, загруженную из файла; возвращает сводку."""
+    path = path or artifact_path(kb.source)
+    st = os.stat(kb.source)
+    payload = pickle.dumps(kb, protocol=pickle.HIGHEST_PROTOCOL)
+    header = HEADER.pack(MAGIC, VERSION, CODE, st.st_size, st.st_mtime_ns,
+                         bytes.fromhex(kb.digest), hashlib.sha256(payload).digest())
+    # Пишем во временный файл и подменяем: читатель не увидит половину файла
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp, path)
+    return {'rules': len(kb.rules), 'bytes': HEADER.size + len(payload)}
+
+
+def read_artifact(path: str, source: Optional[str] = None) -> Optional[KnowledgeBase]:
+    """База знаний из файла или None, если его нет или он устарел.
+
+    source - исходный JSON, с которым сверяется файл; без него
+    проверяются только версия и целостность данных.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            payload = f.read()
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, version, code, size, mtime_ns, digest, checksum = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or code != CODE:
+        return None
+
+    if source is not None:
+        st = os.stat(source)
+        if (st.st_size, st.st_mtime_ns) != (size, mtime_ns) and file_digest(source) != digest.hex():
+            return None
+    if hashlib.sha256(payload).digest() != checksum:
+        return None
+    # Миллионы создаваемых объектов раз за разом запускали бы сборщик
+    # циклов, хотя мусора при чтении нет; без него чтение в разы быстрее
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(payload)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_knowledge_base(path: str = 'lab.json') -> KnowledgeBase:
+    """Скомпилированная база знаний, если она свежая, иначе разбор JSON."""
+    if path.endswith(SUFFIX):
+        kb = read_artifact(path)
+        if kb is None:
+            raise ValueError(f"{path}: повреждённая или несовместимая скомпилированная база")
+        return kb
+    return read_artifact(artifact_path(path), path) or KnowledgeBase.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Компиляция базы знаний в бинарный файл")
+    parser.add_argument('rules', nargs='?', default='lab.json', help="файл .json или .jsonl")
+    parser.add_argument('--output', '-o', default=None, help="файл результата (по умолчанию .kbc)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    kb = KnowledgeBase.load(args.rules)
+    output = args.output or artifact_path(args.rules)
+    summary = write_artifact(kb, output)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    read_artifact(output, args.rules)
+    opened = time.perf_counter() - start
+    print(f"{output}: правил {summary['rules']}, {summary['bytes']} байт, "
+          f"компиляция {elapsed:.2f} с, загрузка {opened * 1000:.1f} мс", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Микробенчмарк: интерпретация условий против скомпилированной формы."""
+
+import timeit
+
+from engine import RuleEngine
+from factstore import FactStore
+
+# Типичные состояния памяти: начало опроса и завершённый сбор данных
+STATES = {
+    'начало': {'system_ready': True},
+    'данные собраны': {
+        'system_ready': True,
+        'energy_source': 'introversion',
+        'information_processing': 'intuition',
+        'decision_making': 'thinking',
+        'lifestyle': 'judging',
+        'extraversion_level': 2,
+        'conscientiousness': 4,
+        'emotional_stability': 3,
+        'openness_experience': 5,
+        'personality_category': 'introvert',
+        'perception_category': 'intuitive',
+        'decision_category': 'thinker',
+        'lifestyle_category': 'judger',
+        'all_data_collected': True,
+        'mbti_type': 'INTJ',
+    },
+}
+
+
+def main(rules_file: str = 'lab.json', number: int = 2000):
+    engine = RuleEngine(rules_file)
+    rules = engine.memory.rules
+    compiled = engine.compiled
+
+    def interpreted():
+        return [all(engine.check_condition(c) for c in rule['conditions']) for rule in rules]
+
+    def precompiled():
+        return [engine.check_all(conds) for conds in compiled]
+
+    print(f"Правил: {len(rules)}, повторов: {number}")
+    for name, facts in STATES.items():
+        engine.memory.facts = FactStore(engine.kb.schema, facts)
+        assert interpreted() == precompiled()
+
+        t_interp = min(timeit.repeat(interpreted, number=number, repeat=5))
+        t_comp = min(timeit.repeat(precompiled, number=number, repeat=5))
+        per_pass = 1e6 / number
+        print(f"{name:>15}: интерпретатор {t_interp * per_pass:8.1f} мкс, "
+              f"компиляция {t_comp * per_pass:8.1f} мкс, "
+              f"ускорение x{t_interp / t_comp:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Бенчмарк движков на синтетических базах знаний в формате lab.json.
+
+Пример запуска:
+    python benchmark.py --sizes 1000 10000 100000 --fan-in 3 --depth 10 -o bench.json
+    python benchmark.py --sizes 1000000 --engines package --format jsonl
+    python benchmark.py --pool 1 2 4 8 16 32 --sessions 100000
+
+Генерируется база из N правил: цепочка вопросов, как в lab.json, и слои
+выводящих правил глубиной depth, каждое с fan_in условиями на факты
+предыдущего слоя. Ответы берутся из сценария вместо input(). Для
+каждого движка (lab2.py и пакет expert_system) измеряются время загрузки
+и вывода, циклы в секунду, время сопоставления правил (вывод без времени
+действий) и пиковая память (tracemalloc, отдельным прогоном). Результаты
+пишутся в JSON, чтобы сравнивать их между версиями. С --format jsonl
+база пишется по правилу в строке (её читает только пакет).
+
+С --pool сравнивается пропускная способность pool.run_pool на случайных
+анкетах к lab.json при разном числе процессов: сеансы в секунду и
+ускорение относительно первого числа в списке.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from engine import RuleEngine
+from knowledge_base import KnowledgeBase
+from outcomes import answer_domains, answers_at
+from pool import run_pool
+
+# lab2.py лежит уровнем выше
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FORMAT_VERSION = 1
+QUESTIONS = 8
+
+
+def synthetic_kb(rules: int, fan_in: int = 3, depth: int = 10, seed: int = 0) -> Dict:
+    """База знаний из rules правил: QUESTIONS вопросов и depth слоёв вывода."""
+    rnd = random.Random(seed)
+    questions = {f"q{i}": {'text': f"Вопрос {i}", 'type': 'integer', 'validation': 'range_1_5'}
+                 for i in range(QUESTIONS)}
+
+    out = []
+    prev = 'system_ready'
+    for i in range(QUESTIONS):
+        out.append({'id': f"ask_q{i}",
+                    'conditions': [{'fact': prev, 'exists': True},
+                                   {'fact': f"q{i}", 'exists': False}],
+                    'actions': [{'type': 'ask_user', 'question': f"q{i}", 'fact': f"q{i}"}]})
+        prev = f"q{i}"
+
+    derived = max(rules - QUESTIONS, 0)
+    layers: List[List] = [[] for _ in range(depth)]
+    for n in range(derived):
+        level = n * depth // derived
+        below = layers[level - 1] if level else []
+        fact = f"f{level}_{n}"
+        conds = []
+        for _ in range(fan_in):
+            if not below:
+                conds.append({'fact': f"q{rnd.randrange(QUESTIONS)}", 'operator': '>=',
+                              'value': rnd.randint(1, 2)})
+            else:
+                src, value = rnd.choice(below)
+                if rnd.random() < 0.5:
+                    conds.append({'fact': src, 'exists': True})
+                else:
+                    conds.append({'fact': src, 'value': value})
+        conds.append({'fact': fact, 'exists': False})
+        value = n % 3
+        out.append({'id': f"r{n}", 'conditions': conds,
+                    'actions': [{'type': 'assert', 'fact': fact, 'value': value}]})
+        layers[level].append((fact, value))
+
+    return {'metadata': {'domain': 'synthetic', 'rules': rules, 'fan_in': fan_in,
+                         'depth': depth, 'seed': seed},
+            'rules': out, 'questions': questions, 'initial_facts': {'system_ready': True}}
+
+
+def write_kb(data: Dict, f, fmt: str = 'json'):
+    """Записывает базу знаний в JSON или JSONL (правило в строке, затем разделы)."""
+    if fmt == 'json':
+        json.dump(data, f, ensure_ascii=False)
+        return
+    for rule in data['rules']:
+        f.write(json.dumps(rule, ensure_ascii=False) + "\n")
+    for name, value in data.items():
+        if name != 'rules':
+            f.write(json.dumps({name: value}, ensure_ascii=False) + "\n")
+
+
+def scripted_answers(seed: int = 0) -> Dict[str, int]:
+    rnd = random.Random(seed)
+    return {f"q{i}": rnd.randint(1, 5) for i in range(QUESTIONS)}
+
+
+def timed_actions(engine) -> List[float]:
+    """Оборачивает execute_action экземпляра; возвращает [время действий, число]."""
+    stats = [0.0, 0]
+    execute = engine.execute_action
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return execute(*args, **kwargs)
+        finally:
+            stats[0] += time.perf_counter() - start
+            stats[1] += 1
+
+    engine.execute_action = wrapper
+    return stats
+
+
+def run_package(path: str, answers: Dict, matcher: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    kb = KnowledgeBase.load(path)
+    load = time.perf_counter() - start
+
+    engine = RuleEngine(kb, matcher=matcher, answers=answers, verbose=False)
+    actions = timed_actions(engine)
+    start = time.perf_counter()
+    facts = engine.infer()
+    infer = time.perf_counter() - start
+    return {'load_s': load, 'infer_s': infer, 'cycles': engine.cycles,
+            'actions_s': actions[0], 'fired': actions[1], 'facts': len(facts)}
+
+
+def run_lab2(path: str, answers: Dict, matcher: str) -> Dict[str, Any]:
+    import lab2
+
+    start = time.perf_counter()
+    engine = lab2.RuleEngine(path, trace=None)
+    load = time.perf_counter() - start
+
+    engine.ask = answers.__getitem__
+    actions = timed_actions(engine)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.run()
+    infer = time.perf_counter() - start
+    return {'load_s': load, 'infer_s': infer, 'cycles': engine.cycle,
+            'actions_s': actions[0], 'fired': actions[1], 'facts': len(engine.facts)}
+
+
+ENGINES: Dict[str, Callable[[str, Dict, str], Dict[str, Any]]] = {
+    'package': run_package,
+    'lab2': run_lab2,
+}
+
+
+def measure(engine: str, path: str, answers: Dict, matcher: str) -> Dict[str, Any]:
+    """Прогон для времени и отдельный прогон под tracemalloc для пика памяти."""
+    result = ENGINES[engine](path, answers, matcher)
+    result['match_s'] = max(result['infer_s'] - result.pop('actions_s'), 0.0)
+    result['cycles_per_s'] = result['cycles'] / result['infer_s'] if result['infer_s'] else 0.0
+
+    tracemalloc.start()
+    try:
+        ENGINES[engine](path, answers, matcher)
+        result['peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def pool_scaling(path: str, workers: List[int], sessions: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Сеансы в секунду run_pool на sessions случайных анкетах для каждого числа процессов."""
+    kb = KnowledgeBase.load(path)
+    domains = answer_domains(kb)
+    total = 1
+    for _, _, values in domains:
+        total *= len(values)
+    rnd = random.Random(seed)
+    lines = [json.dumps(answers_at(domains, rnd.randrange(total)), ensure_ascii=False)
+             for _ in range(sessions)]
+
+    results = []
+    with open(os.devnull, 'w', encoding='utf-8') as out:
+        for n in workers:
+            # Не меньше четырёх пачек на процесс, чтобы все были заняты до конца
+            chunk = max(1, min(2000, sessions // (4 * n)))
+            start = time.perf_counter()
+            done = run_pool(lines, out, kb, n, chunk)
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed > 0 else 0.0
+            base = results[0]['sessions_per_s'] if results else rate
+            results.append({'workers': n, 'sessions': done, 'elapsed_s': elapsed,
+                            'sessions_per_s': rate, 'speedup': rate / base if base else 0.0})
+            print(f"{n:>4} процессов: {done} сеансов за {elapsed:.2f} с, {rate:.0f} сеансов/с, "
+                  f"ускорение {results[-1]['speedup']:.2f}x", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк движков правил")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help="число правил")
+    parser.add_argument('--fan-in', type=int, default=3, help="условий на правило")
+    parser.add_argument('--depth', type=int, default=10, help="глубина цепочки вывода (до 40)")
+    parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument('--matcher', default='indexed', help="режим сопоставления пакета")
+    parser.add_argument('--format', choices=('json', 'jsonl'), default='json', help="формат файла базы")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', default='-', help="файл JSON-результатов")
+    parser.add_argument('--pool', type=int, nargs='+', metavar='N',
+                        help="вместо движков сравнить run_pool при N процессах")
+    parser.add_argument('--sessions', type=int, default=20000, help="анкет для --pool")
+    parser.add_argument('--rules', default='lab.json', help="база знаний для --pool")
+    args = parser.parse_args()
+    if not 1 <= args.depth <= 40:
+        parser.error("глубина должна быть от 1 до 40 (лимит 50 циклов вывода)")
+    if args.format == 'jsonl' and 'lab2' in args.engines:
+        parser.error("lab2.py читает только JSON: для jsonl укажите --engines package")
+
+    if args.pool:
+        if min(args.pool) < 1 or args.sessions < 1:
+            parser.error("число процессов и анкет должно быть не меньше 1")
+        report = {'format': FORMAT_VERSION, 'python': platform.python_version(),
+                  'cpus': os.cpu_count(), 'rules': args.rules, 'seed': args.seed,
+                  'pool': pool_scaling(args.rules, args.pool, args.sessions, args.seed)}
+        write_report(report, args.output)
+        return
+
+    answers = scripted_answers(args.seed)
+    results = []
+    for size in args.sizes:
+        data = synthetic_kb(size, args.fan_in, args.depth, args.seed)
+        with tempfile.NamedTemporaryFile('w', suffix='.' + args.format, encoding='utf-8',
+                                         delete=False) as f:
+            write_kb(data, f, args.format)
+        del data
+        try:
+            for engine in args.engines:
+                result = measure(engine, f.name, answers, args.matcher)
+                result.update(engine=engine, rules=size, fan_in=args.fan_in, depth=args.depth)
+                results.append(result)
+                print(f"{engine:>8} {size:>7} правил: загрузка {result['load_s']:.3f} с, "
+                      f"вывод {result['infer_s']:.3f} с, {result['cycles_per_s']:.1f} циклов/с, "
+                      f"сопоставление {result['match_s']:.3f} с, пик {result['peak_kb']:.0f} КБ",
+                      file=sys.stderr)
+        finally:
+            os.unlink(f.name)
+
+    report = {'format': FORMAT_VERSION, 'python': platform.python_version(),
+              'matcher': args.matcher, 'kb_format': args.format, 'seed': args.seed, 'results': results}
+    write_report(report, args.output)
+
+
+def write_report(report: Dict, output: str):
+    """Печатает отчёт JSON или пишет его в файл."""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output == '-':
+        print(text)
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Кэш итогов анализа по каноническому вектору ответов.
+
+Итоговые факты однозначно определяются ответами, а область ответов мала
+(варианты выбора и шкалы 1-5), поэтому повторные сеансы с теми же
+ответами берутся из LRU-кэша без прямого вывода.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+from engine import RuleEngine
+from artifact import load_knowledge_base
+from knowledge_base import KnowledgeBase
+from memory import normalize_answer
+
+
+class OutcomeCache:
+    """LRU-кэш: вектор ответов -> итоговые факты.
+
+    Если база знаний задана путём, перед каждым обращением проверяется
+    файл: при смене размера/времени изменения он перечитывается, и если
+    sha256 содержимого другой, кэш очищается.
+    """
+
+    def __init__(self, kb: Union[str, KnowledgeBase] = 'lab.json', maxsize: Optional[int] = 4096):
+        self.path = kb if isinstance(kb, str) else None
+        self.kb = load_knowledge_base(kb) if isinstance(kb, str) else kb
+        self.stat = self._stat()
+        self.maxsize = maxsize  # None - без ограничения
+        self.entries: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        if self.path is None:
+            return None
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def knowledge_base(self) -> KnowledgeBase:
+        """Текущая база знаний; перечитывает файл, если он изменился."""
+        if self.path is not None:
+            stat = self._stat()
+            if stat != self.stat:
+                self.stat = stat
+                kb = load_knowledge_base(self.path)
+                if kb.digest != self.kb.digest:
+                    self.clear()
+                    self.invalidations += 1
+                self.kb = kb
+        return self.kb
+
+    def key(self, answers: Dict, kb: Optional[KnowledgeBase] = None) -> Tuple:
+        """Канонический вектор ответов в порядке плана опроса.
+
+        Пропускаемые планировщиком вопросы в ключ не входят: на итог они
+        не влияют. Некорректный ответ - ValueError, как и при анализе.
+        """
+        kb = kb or self.kb
+        if not isinstance(answers, Mapping):
+            raise ValueError(f"Ответы должны быть JSON-объектом, а не {type(answers).__name__}")
+        questions = kb.questions
+        key = []
+        for qid, _, _ in kb.question_plan:
+            if qid not in answers:
+                raise ValueError(f"Нет ответа на вопрос: {qid}")
+            key.append(normalize_answer(qid, questions[qid], answers[qid]))
+        return tuple(key)
+
+    def evaluate(self, answers: Dict) -> Dict:
+        """Итоговые факты для ответов: из кэша или после прямого вывода."""
+        kb = self.knowledge_base()
+        key = self.key(answers, kb)
+        entries = self.entries
+
+        facts = entries.get(key)
+        if facts is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return dict(facts)
+
+        self.misses += 1
+        facts = dict(RuleEngine(kb, answers=answers, verbose=False).infer())
+        entries[key] = facts
+        if self.maxsize is not None and len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return dict(facts)
+
+    def clear(self):
+        """Удаляет все сохранённые итоги (счётчики не сбрасываются)."""
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики попаданий и промахов, размер кэша и хэш базы знаний."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries),
+                'maxsize': self.maxsize, 'invalidations': self.invalidations,
+                'digest': self.kb.digest}
+
+    def __len__(self):
+        return len(self.entries)
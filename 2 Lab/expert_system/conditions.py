@@ -0,0 +1,83 @@
+"""Компиляция условий правил в предикаты."""
+
+import operator
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+# Скомпилированное условие: (факт, функция сравнения, ожидаемое значение,
+# нужно ли значение факта). Кортеж вместо замыкания - его можно сериализовать.
+Compiled = Tuple[str, Any, Any, bool]
+# То же с номером слота хранилища фактов вместо имени (см. factstore)
+SlotCompiled = Tuple[int, Any, Any, bool]
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+def is_in(value, options) -> bool:
+    """Проверка принадлежности значения множеству вариантов."""
+    return value in options
+
+
+def compile_condition(cond: Dict) -> Compiled:
+    """Переводит условие из lab.json в кортеж для быстрой проверки."""
+    fact = cond['fact']
+
+    if 'exists' in cond:
+        return (fact, operator.is_not if cond['exists'] else operator.is_, None, False)
+
+    expected = cond['value']
+    if 'operator' not in cond:
+        if isinstance(expected, (list, tuple)):
+            return (fact, is_in, frozenset(expected), True)
+        return (fact, operator.eq, expected, True)
+
+    op = OPERATORS.get(cond['operator'])
+    if op is None:
+        raise ValueError(f"Неизвестный оператор в условии: {cond['operator']}")
+    return (fact, op, expected, True)
+
+
+def compile_conditions(conditions: List[Dict]) -> Tuple[Compiled, ...]:
+    """Компилирует список условий правила."""
+    return tuple(compile_condition(c) for c in conditions)
+
+
+def to_slots(compiled: Tuple[Compiled, ...], slot: Mapping[str, int]) -> Tuple[SlotCompiled, ...]:
+    """Заменяет имена фактов в скомпилированных условиях номерами слотов."""
+    return tuple((slot[fact], op, expected, needs_value)
+                 for fact, op, expected, needs_value in compiled)
+
+
+def test_all(compiled: Tuple[Compiled, ...], facts: Dict) -> bool:
+    """Проверяет все скомпилированные условия правила."""
+    for fact, op, expected, needs_value in compiled:
+        value = facts.get(fact)
+        if needs_value and value is None:
+            return False
+        if not op(value, expected):
+            return False
+    return True
+
+
+def test_slot(compiled: SlotCompiled, slots: Sequence) -> bool:
+    """Проверяет одно условие по значениям слотов (FactStore.slots)."""
+    slot, op, expected, needs_value = compiled
+    value = slots[slot]
+    if needs_value and value is None:
+        return False
+    return op(value, expected)
+
+
+def test_all_slots(compiled: Tuple[SlotCompiled, ...], slots: Sequence) -> bool:
+    """Проверяет все условия правила по значениям слотов."""
+    for slot, op, expected, needs_value in compiled:
+        value = slots[slot]
+        if needs_value and value is None:
+            return False
+        if not op(value, expected):
+            return False
+    return True
\ No newline at end of file
@@ -1,33 +1,86 @@
 """Основной движок правил - переносим RuleEngine сюда."""
 
-import json
-from typing import Any, Dict, List
-from memory import Memory  # новый модуль
-from expert_system.actions import ActionHandler  # новый модуль
+from typing import Any, Dict, List, Optional, Tuple, Union
+from memory import Memory, PendingQuestion, normalize_answer  # новый модуль
+from actions import ActionHandler  # новый модуль
+from rete import ReteMatcher
+from conditions import SlotCompiled, test_all_slots, test_slot
+from agenda import Agenda
+from planner import QuestionCursor
+from artifact import load_knowledge_base
+from knowledge_base import KnowledgeBase
+from tracing import NULL_SINK, ConsoleSink, TraceSink
+
+
+MATCHERS = ('naive', 'indexed', 'rete')
 
 
 class RuleEngine:
-    def __init__(self, rules_file: str = 'lab.json'):
-        with open(rules_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Используем модуль памяти
-        self.memory = Memory(
-            rules=data['rules'],
-            questions=data['questions'],
-            initial_facts=data['initial_facts'].copy(),
-            mbti_mapping=data.get('mbti_mapping', {})
-        )
+    def __init__(self, kb: Union[str, KnowledgeBase] = 'lab.json', matcher: str = 'indexed',
+                 strategy='salience', refraction: bool = True,
+                 answers: Optional[Dict] = None, verbose: bool = True,
+                 trace: Optional[TraceSink] = None, profiler=None):
+        if matcher not in MATCHERS:
+            raise ValueError(f"Неизвестный режим сопоставления: {matcher}")
+
+        # Путь к файлу: берётся скомпилированная база (lab.kbc), если она
+        # не устарела, иначе JSON; для серии сеансов передавайте
+        # готовый KnowledgeBase, чтобы не разбирать lab.json повторно
+        if isinstance(kb, str):
+            kb = load_knowledge_base(kb)
+        self.kb = kb
+
+        # Используем модуль памяти; без консоли input() не вызывается -
+        # недостающий ответ даёт PendingQuestion
+        if answers is None and not verbose:
+            answers = {}
+        self.memory = Memory(kb, answers=answers)
 
         # Используем модуль обработки действий
-        self.actions = ActionHandler(self.memory)
+        # Трассировка: по умолчанию консоль (интерактивный режим) или ничего
+        if trace is None:
+            trace = ConsoleSink() if verbose else NULL_SINK
+        self.trace = trace
+        self.actions = ActionHandler(self.memory, trace)
+        self.cycles = 0  # номер текущего цикла активации
+        self.capped = False  # infer() упёрся в лимит циклов
+
+        # Условия скомпилированы при загрузке базы знаний и ссылаются
+        # на слоты хранилища фактов
+        self.compiled = kb.slot_compiled
+
+        # naive - полный перебор правил на каждом цикле,
+        # indexed - перепроверка правил, затронутых изменёнными фактами,
+        # rete - перепроверка только условий по изменившимся фактам
+        self.mode = matcher
+        self.matcher = None
+        self.active = None
+        if matcher == 'rete':
+            slots = self.memory.facts.slots
+            self.matcher = ReteMatcher(self.memory.rules, self.compiled, self.memory,
+                                       lambda cond: test_slot(cond, slots), kb.schema.slot.get,
+                                       skip=kb.idle_rules)
+        elif matcher == 'indexed':
+            self.active = set(kb.initial_active)
+            self.memory.dirty = set()
+
+        # Агенда упорядочивает активации выбранной стратегией
+        self.agenda = Agenda(kb, self.memory, strategy, refraction)
+
+        # Курсор по заранее построенному плану опроса
+        self.questions = QuestionCursor(kb.question_plan, self.memory)
+
+        # Профилировщик (profiler.RuleProfiler) подменяет методы этого
+        # экземпляра обёртками; без него горячий путь не меняется
+        if profiler is not None:
+            profiler.attach(self)
 
     def ask(self, qid: str) -> Any:
         """Задает вопрос пользователю."""
         return self.memory.ask_question(qid)
 
     def check_condition(self, cond: Dict) -> bool:
-        """Проверяет одно условие."""
+        """Проверяет одно условие в исходном виде (без компиляции)."""
         fact = self.memory.facts.get(cond['fact'])
 
         if 'exists' in cond:
@@ -51,66 +104,146 @@ class RuleEngine:
         if op == '<=': return fact <= expected
         return False
 
-    def check_all(self, conditions: List[Dict]) -> bool:
-        """Проверяет все условия."""
-        return all(self.check_condition(c) for c in conditions)
+    def check_all(self, conditions: Tuple[SlotCompiled, ...]) -> bool:
+        """Проверяет все скомпилированные условия правила."""
+        return test_all_slots(conditions, self.memory.facts.slots)
 
-    def execute_action(self, action: Dict):
+    def check_rule(self, idx: int) -> bool:
+        """Проверяет условия правила с номером idx."""
+        return test_all_slots(self.compiled[idx], self.memory.facts.slots)
+
+    def execute_action(self, action: Dict, rule_id: Optional[str] = None):
         """Выполняет одно действие через ActionHandler."""
-        self.actions.execute(action)
+        self.actions.execute(action, rule_id, self.cycles)
+
+    def match(self) -> List[int]:
+        """Возвращает номера активированных правил в порядке базы знаний."""
+        if self.matcher is not None:
+            return self.matcher.activations()
+
+        if self.mode == 'indexed':
+            for idx in self.memory.candidate_rules():
+                if self.check_rule(idx):
+                    self.active.add(idx)
+                else:
+                    self.active.discard(idx)
+            return sorted(self.active)
+
+        idle = self.kb.idle_rules
+        return [idx for idx in range(len(self.compiled))
+                if idx not in idle and self.check_rule(idx)]
 
     def run_cycle(self) -> bool:
         """Выполняет один цикл активации правил."""
-        activated = []
-        for rule in self.memory.rules:
-            if self.check_all(rule['conditions']):
-                activated.append(rule)
+        self.cycles += 1
+        for idx in self.match():
+            self.agenda.push(idx)
 
-        if not activated:
+        if not self.agenda:
             return False
 
-        # СТРАТЕГИЯ ПО ПОРЯДКУ: выполняем правила как есть, без сортировки
-        for rule in activated:
-            for action in rule['actions']:
-                self.execute_action(action)
+        # Выполняем активации в порядке стратегии агенды
+        rules = self.memory.rules
+        memory = self.memory
+        while self.agenda:
+            idx = self.agenda.pop()
+            rule = rules[idx]
+            # Записанные действиями факты получают обоснование - это правило
+            memory.rule = idx
+            try:
+                for action in rule['actions']:
+                    self.execute_action(action, rule['id'])
+            except PendingQuestion:
+                # Ответ ещё не получен: после него infer() продолжит
+                # с этого же правила, а не с начала
+                self.agenda.interrupt()
+                raise
+            finally:
+                memory.rule = None
 
         return True
 
+    def _invalidate(self, names: List[str]):
+        """Отменяет факты и снимает рефракцию с правил, которые их читают
+        или вывели: иначе правило без охранного условия не сработает снова."""
+        rule_index = self.kb.rule_index
+        justifications = self.memory.justifications
+        self.agenda.forget(idx for name in names for idx in rule_index.get(name, ()))
+        self.agenda.forget(justifications[name] for name in names if name in justifications)
+        self.memory.retract(names)
+
+    def retract(self, name: str) -> List[str]:
+        """Отменяет факт и всё, что из него выведено; возвращает отменённые факты.
+
+        Отменённый ответ будет задан снова при следующем infer().
+        """
+        if name not in self.memory.facts:
+            return []
+        lost = [name] + self.memory.dependents(name, retracted=True)
+        self._invalidate(lost)
+        for qid, fact in self.kb.answer_facts.items():
+            if fact == name:
+                self.memory.asked.discard(qid)
+                if self.memory.answers is not None:
+                    self.memory.answers = {k: v for k, v in self.memory.answers.items() if k != qid}
+        self.questions.reset()
+        return lost
+
+    def change_answer(self, qid: str, value: Any) -> Dict:
+        """Меняет ответ и заново выводит только зависящие от него факты."""
+        if qid not in self.kb.answer_facts:
+            raise ValueError(f"Неизвестный вопрос: {qid}")
+        fact = self.kb.answer_facts[qid]
+        value = normalize_answer(qid, self.kb.questions[qid], value)
+        if self.memory.answers is not None:
+            self.memory.answers = {**self.memory.answers, qid: value}
+
+        if self.memory.facts.get(fact) != value:
+            self._invalidate(self.memory.dependents(fact, retracted=False))
+            self.agenda.forget(self.kb.rule_index.get(fact, ()))
+            self.memory.set_answer(fact, value)
+            self.memory.asked.add(qid)
+        return self.infer()
+
     def run(self):
         """Основной цикл выполнения системы."""
         print("\n" + "=" * 50)
         print("Экспертная система: Анализ личности")
         print("=" * 50)
 
+        self.infer()
+
+        # Вывод результатов
+        self.memory.print_results()
+
+    def infer(self) -> Dict:
+        """Прямой вывод до завершения анализа; возвращает итоговые факты."""
         cycle = 0
         while cycle < 50:
             cycle += 1
 
             # Проверяем, все ли данные собраны
             if self.memory.facts.get('all_data_collected'):
-                # Запускаем еще несколько циклов для обработки рекомендаций
+                # Запускаем еще несколько циклов для обработки рекомендаций,
+                # пока в агенде остаются новые активации
                 for _ in range(5):
-                    self.run_cycle()
+                    if not self.run_cycle():
+                        break
                 break
 
             if not self.run_cycle():
-                # Прямой опрос
-                for rule in self.memory.rules:
-                    for action in rule.get('actions', []):
-                        if action['type'] == 'ask_user':
-                            qid = action['question']
-                            fact = action['fact']
-                            if qid not in self.memory.asked and self.memory.facts.get(fact) is None:
-                                ans = self.ask(qid)
-                                self.memory.facts[fact] = ans
-                                self.memory.asked.add(qid)
-                                break
-                    else:
-                        continue
-                    break
-                else:
+                # Прямой опрос: следующий полезный вопрос из плана
+                action = self.questions.next()
+                if action is None:
                     # Больше нет вопросов
                     break
-
-        # Вывод результатов
-        self.memory.print_results()
\ No newline at end of file
+                try:
+                    self.execute_action(action)
+                except PendingQuestion:
+                    self.questions.retry()
+                    raise
+        else:
+            # Вывод остановлен по лимиту циклов, а не завершился сам
+            self.capped = True
+
+        return self.memory.facts
\ No newline at end of file
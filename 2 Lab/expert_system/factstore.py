@@ -0,0 +1,101 @@
+"""Компактное хранилище фактов сеанса с целочисленными слотами."""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+
+def intern_value(value: Any) -> Any:
+    """Интернирует строки, чтобы сравнение с вариантами шло по ссылке."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class FactSchema:
+    """Имена фактов базы знаний и их номера слотов (назначаются при загрузке)."""
+
+    __slots__ = ('names', 'slot')
+
+    def __init__(self, names: Iterable[str]):
+        self.names: Tuple[str, ...] = tuple(dict.fromkeys(sys.intern(n) for n in names))
+        self.slot: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_rules(cls, initial_facts: Mapping, rules: Iterable[Mapping],
+                   goals: Iterable[str] = ()) -> 'FactSchema':
+        """Собирает имена из начальных фактов, условий и действий правил."""
+        names = list(initial_facts)
+        for rule in rules:
+            names.extend(cond['fact'] for cond in rule['conditions'])
+            names.extend(action['fact'] for action in rule['actions'] if 'fact' in action)
+        names.extend(goals)
+        return cls(names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"FactSchema({len(self.names)} фактов)"
+
+
+class FactStore(MutableMapping):
+    """Факты сеанса: список значений по слотам схемы вместо словаря.
+
+    Ведёт себя как dict имя -> значение. None означает отсутствие факта
+    (так же его понимают условия правил). Имена вне схемы (например,
+    записанные пользовательским действием) хранятся в отдельном словаре.
+    """
+
+    __slots__ = ('schema', 'slots', 'extra')
+
+    def __init__(self, schema: FactSchema, initial: Optional[Mapping] = None):
+        self.schema = schema
+        self.slots = [None] * len(schema.names)
+        self.extra: Optional[Dict[str, Any]] = None
+        if initial:
+            for name, value in initial.items():
+                self[name] = value
+
+    def __getitem__(self, name: str) -> Any:
+        slot = self.schema.slot.get(name)
+        value = self.slots[slot] if slot is not None else (self.extra or {}).get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def get(self, name: str, default: Any = None) -> Any:
+        slot = self.schema.slot.get(name)
+        value = self.slots[slot] if slot is not None else (self.extra or {}).get(name)
+        return default if value is None else value
+
+    def __contains__(self, name) -> bool:
+        return self.get(name) is not None
+
+    def __setitem__(self, name: str, value: Any):
+        slot = self.schema.slot.get(name)
+        if slot is not None:
+            self.slots[slot] = value
+        elif value is None:
+            if self.extra:
+                self.extra.pop(name, None)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def __delitem__(self, name: str):
+        if name not in self:
+            raise KeyError(name)
+        self[name] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for name, value in zip(self.schema.names, self.slots):
+            if value is not None:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return len(self.slots) - self.slots.count(None) + len(self.extra or ())
+
+    def __repr__(self):
+        return f"FactStore({dict(self)!r})"
@@ -0,0 +1,304 @@
+"""Неизменяемая база знаний, общая для многих сеансов анализа."""
+
+import copyreg
+import hashlib
+import json
+import sys
+import time
+from collections.abc import Iterator, Mapping
+from types import MappingProxyType
+from typing import Any, Dict, List
+
+from actions import action_reads, build_dispatch, career_table
+from conditions import compile_conditions, test_all, to_slots
+from factstore import FactSchema, intern_value
+from loader import read_sections
+from planner import plan_questions
+
+
+def freeze(value: Any) -> Any:
+    """Рекурсивно превращает dict/list в неизменяемые MappingProxyType/tuple.
+
+    Строки интернируются: одинаковые варианты ответов и значения фактов
+    во всех правилах становятся одним объектом.
+    """
+    if isinstance(value, MappingProxyType):
+        return value  # уже заморожено при разборе (frozen_object)
+    if isinstance(value, dict):
+        return MappingProxyType({intern_value(k): freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return intern_value(value)
+
+
+def _frozen_list(items: List) -> tuple:
+    return tuple([sys.intern(v) if type(v) is str else _frozen_list(v) if type(v) is list else v
+                  for v in items])
+
+
+def frozen_object(pairs: List) -> MappingProxyType:
+    """object_pairs_hook для json: объект замораживается сразу при разборе.
+
+    Вложенные объекты к этому моменту уже заморожены, остаётся заменить
+    списки кортежами и интернировать строки - как делает freeze, но без
+    промежуточного словаря и повторного обхода.
+    """
+    obj = {}
+    intern = sys.intern
+    for key, value in pairs:
+        kind = type(value)
+        if kind is str:
+            value = intern(value)
+        elif kind is list:
+            value = _frozen_list(value)
+        obj[intern(key)] = value
+    return MappingProxyType(obj)
+
+
+def _mapping_proxy(mapping: Dict) -> MappingProxyType:
+    return MappingProxyType(mapping)
+
+
+# MappingProxyType сам по себе не сериализуется pickle; сохраняем его как
+# словарь, чтобы база знаний писалась и читалась без перестройки (см. artifact.py)
+copyreg.pickle(MappingProxyType, lambda proxy: (_mapping_proxy, (dict(proxy),)))
+
+
+def validate_rule(rule: Dict, pos: int, seen: set):
+    """Проверяет структуру одного правила; seen - уже встреченные id."""
+    if not isinstance(rule, Mapping):
+        raise ValueError(f"Правило #{pos}: ожидался объект")
+    rid = rule.get('id', f"#{pos}")
+    for key in ('id', 'conditions', 'actions'):
+        if key not in rule:
+            raise ValueError(f"Правило {rid}: нет поля '{key}'")
+    if rid in seen:
+        raise ValueError(f"Правило {rid} объявлено повторно")
+    seen.add(rid)
+
+    for cond in rule['conditions']:
+        if 'fact' not in cond or ('exists' not in cond and 'value' not in cond):
+            raise ValueError(f"Правило {rid}: некорректное условие {cond}")
+
+    for action in rule['actions']:
+        atype = action.get('type')
+        if atype is None:
+            raise ValueError(f"Правило {rid}: действие без типа")
+        if atype == 'assert' and ('fact' not in action or 'value' not in action):
+            raise ValueError(f"Правило {rid}: assert требует 'fact' и 'value'")
+
+
+def validate_questions(rules, questions):
+    """Проверяет, что ask_user ссылаются на объявленные вопросы."""
+    for rule in rules:
+        for action in rule['actions']:
+            if action['type'] == 'ask_user':
+                if action.get('question') not in questions or 'fact' not in action:
+                    raise ValueError(f"Правило {rule['id']}: неизвестный вопрос {action.get('question')}")
+
+
+# Разделы, которые читаются как словари
+OBJECT_SECTIONS = ('questions', 'initial_facts')
+
+
+def json_type(value: Any) -> str:
+    """Название JSON-типа значения для сообщений об ошибках."""
+    if isinstance(value, Mapping):
+        return 'объект'
+    if isinstance(value, (list, tuple)):
+        return 'массив'
+    if isinstance(value, str):
+        return 'строка'
+    if isinstance(value, bool):
+        return 'логическое значение'
+    if value is None:
+        return 'null'
+    return 'число'
+
+
+class KnowledgeBaseBuilder:
+    """Пошаговая сборка базы знаний: правила проверяются, замораживаются
+    и компилируются по одному, по мере чтения (см. loader.py)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections: Dict[str, Any] = {}
+        self.rules: List = []
+        self.compiled: List = []
+        self.seen: set = set()
+        self.has_rules = False
+
+    def add_rule(self, rule: Dict):
+        validate_rule(rule, len(self.rules), self.seen)
+        frozen = freeze(rule)
+        self.rules.append(frozen)
+        self.compiled.append(compile_conditions(frozen['conditions']))
+
+    def add_section(self, name: str, value: Any):
+        """Раздел базы знаний; для 'rules' value - список правил или их поток от loader.py."""
+        if name == 'rules':
+            # Список из словаря, кортеж после заморозки или итератор потокового чтения
+            if not isinstance(value, (list, tuple, Iterator)):
+                raise ValueError(f"Раздел '{name}' должен быть массивом правил, а не {json_type(value)}")
+            self.has_rules = True
+            for rule in value:
+                self.add_rule(rule)
+        else:
+            if name in OBJECT_SECTIONS and not isinstance(value, Mapping):
+                raise ValueError(f"Раздел '{name}' должен быть объектом, а не {json_type(value)}")
+            self.sections[name] = value
+
+    def build(self, source: str, digest: str, size: int = None) -> 'KnowledgeBase':
+        kb = object.__new__(KnowledgeBase)
+        kb._assemble(self, source, digest, size)
+        return kb
+
+
+class KnowledgeBase:
+    """Разобранная и проверенная база знаний.
+
+    Создаётся один раз; сеансы (RuleEngine) получают ссылку на неё и
+    хранят только собственные факты и множество заданных вопросов.
+    """
+
+    __slots__ = ('source', 'digest', 'rules', 'questions', 'initial_facts', 'mbti_mapping',
+                 'career_recommendations', 'custom_actions', 'compiled',
+                 'rule_index', 'salience', 'facts_of', 'initial_active', 'dispatch', 'careers',
+                 'question_plan', 'skipped_questions', 'idle_rules', 'schema', 'slot_compiled', 'slots_of',
+                 'supports', 'answer_facts', 'load_stats')
+
+    def __init__(self, data: Dict, source: str = '<dict>', digest: str = None):
+        # sha256 исходного файла (для словаря - его канонического JSON);
+        # по нему кэши результатов узнают, что база знаний сменилась
+        if digest is None:
+            digest = hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False)
+                                    .encode('utf-8')).hexdigest()
+        builder = KnowledgeBaseBuilder()
+        for name, value in data.items():
+            builder.add_section(name, value)
+        self._assemble(builder, source, digest)
+
+    def _assemble(self, builder: KnowledgeBaseBuilder, source: str, digest: str, size: int = None):
+        """Заполняет базу знаний из собранных правил и разделов."""
+        data = builder.sections
+        for section in ('rules', 'questions', 'initial_facts'):
+            if section not in data and not (section == 'rules' and builder.has_rules):
+                raise ValueError(f"В базе знаний нет раздела '{section}'")
+        validate_questions(builder.rules, data['questions'])
+        init = object.__setattr__
+
+        init(self, 'source', source)
+        init(self, 'digest', digest)
+        init(self, 'rules', tuple(builder.rules))
+        init(self, 'questions', freeze(data['questions']))
+        init(self, 'initial_facts', freeze(data['initial_facts']))
+        init(self, 'mbti_mapping', freeze(data.get('mbti_mapping', {})))
+        init(self, 'career_recommendations', freeze(data.get('career_recommendations', {})))
+        init(self, 'custom_actions', freeze(data.get('custom_actions', {})))
+        # Рекомендации по 4-битному индексу MBTI (см. actions.MBTI_CODES)
+        init(self, 'careers', career_table(self.career_recommendations))
+
+        # Тип действия -> обработчик; неизвестные типы - ошибка загрузки
+        init(self, 'dispatch', freeze(build_dispatch(self.custom_actions, self.rules)))
+
+        # Условия скомпилированы при добавлении правил
+        compiled = tuple(builder.compiled)
+        init(self, 'compiled', compiled)
+
+        # Слоты фактов: условия проверяются обращением к списку по номеру
+        schema = FactSchema.from_rules(self.initial_facts, self.rules, data.get('goals', ()))
+        init(self, 'schema', schema)
+        init(self, 'slot_compiled', tuple(to_slots(conds, schema.slot) for conds in compiled))
+
+        # План опроса: вопросы, влияющие на выводы, в порядке правил;
+        # остальные не задаются вовсе
+        plan, skipped = plan_questions(self.rules, compiled, data.get('goals'))
+        init(self, 'question_plan', plan)
+        init(self, 'skipped_questions', skipped)
+        init(self, 'answer_facts', MappingProxyType({
+            action['question']: action['fact'] for rule in reversed(self.rules)
+            for action in rule['actions'] if action['type'] == 'ask_user'}))
+        # Правила, которые только задают пропускаемые вопросы, ничего не
+        # меняют; сопоставление их не активирует, иначе без рефракции
+        # они срабатывали бы на каждом цикле
+        init(self, 'idle_rules', frozenset(
+            idx for idx, rule in enumerate(self.rules)
+            if all(action['type'] == 'ask_user' and action['question'] in skipped
+                   for action in rule['actions'])))
+
+        # Индекс зависимостей: имя факта -> правила, чьи условия его упоминают
+        index: Dict[str, List[int]] = {}
+        for idx, conds in enumerate(compiled):
+            if idx in self.idle_rules:
+                continue
+            for cond in conds:
+                refs = index.setdefault(cond[0], [])
+                if not refs or refs[-1] != idx:
+                    refs.append(idx)
+        init(self, 'rule_index', MappingProxyType({k: tuple(v) for k, v in index.items()}))
+
+        # Данные для агенды: приоритеты и факты из условий каждого правила
+        init(self, 'salience', tuple(rule.get('salience', 0) for rule in self.rules))
+        init(self, 'facts_of', tuple(tuple(dict.fromkeys(c[0] for c in conds))
+                                     for conds in compiled))
+        init(self, 'slots_of', tuple(tuple(schema.slot[name] for name in names)
+                                     for names in self.facts_of))
+
+        # Правила, активные на начальных фактах, - стартовое состояние сеанса
+        facts = dict(data['initial_facts'])
+        init(self, 'initial_active', frozenset(
+            idx for idx, conds in enumerate(compiled)
+            if idx not in self.idle_rules and test_all(conds, facts)))
+
+        # Опоры вывода для поддержки истинности: от значений каких фактов
+        # и от наличия каких фактов зависит результат правила
+        reads = action_reads(self.custom_actions)
+        everything = frozenset(schema.names)
+        supports = []
+        for rule, conds in zip(self.rules, compiled):
+            written = {action['fact'] for action in rule['actions'] if 'fact' in action}
+            value = {c[0] for c in conds if c[3]}
+            presence = {c[0] for c in conds if not c[3]}
+            for action in rule['actions']:
+                if action['type'] in reads:
+                    extra = reads[action['type']]
+                    value |= set(extra) if extra is not None else everything
+            value -= written
+            presence -= value | written
+            supports.append((frozenset(value), frozenset(presence)))
+        init(self, 'supports', tuple(supports))
+
+        # Сведения о загрузке: размер файла и время от начала чтения
+        init(self, 'load_stats', MappingProxyType({
+            'rules': len(self.rules), 'bytes': size,
+            'seconds': time.perf_counter() - builder.started}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("База знаний неизменяема")
+
+    def __reduce__(self):
+        # Состояние передаётся как есть: повторной проверки, компиляции
+        # и заморозки при чтении не будет
+        return (_restore, ({name: getattr(self, name) for name in self.__slots__},))
+
+    @classmethod
+    def load(cls, path: str = 'lab.json') -> 'KnowledgeBase':
+        """Читает и проверяет базу знаний из JSON- или JSONL-файла потоково."""
+        builder = KnowledgeBaseBuilder()
+        with open(path, 'rb') as f:
+            reader, sections = read_sections(f, path, jsonl=path.endswith('.jsonl'),
+                                             object_pairs_hook=frozen_object)
+            for name, value in sections:
+                builder.add_section(name, value)
+        return builder.build(path, reader.hexdigest(), reader.size)
+
+    def __repr__(self):
+        return f"KnowledgeBase({self.source!r}, rules={len(self.rules)})"
+
+
+def _restore(state: Dict) -> KnowledgeBase:
+    """Восстанавливает базу знаний из состояния, полученного через pickle."""
+    kb = object.__new__(KnowledgeBase)
+    for name, value in state.items():
+        object.__setattr__(kb, name, value)
+    return kb
@@ -0,0 +1,222 @@
+"""Потоковое чтение базы знаний из JSON и JSONL.
+
+Пример запуска:
+    python loader.py big_rules.jsonl --memory
+
+Файл читается кусками по CHUNK_SIZE байт. Правила разбираются по одному
+и сразу уходят в KnowledgeBaseBuilder, который проверяет и компилирует
+их; ни текст документа, ни его полный разбор в памяти не держатся.
+Остальные разделы (questions, initial_facts, ...) небольшие и
+разбираются целиком. object_pairs_hook передаётся декодеру JSON: так
+база знаний получает объекты уже замороженными, без второй копии.
+
+Пик памяти при загрузке - это в основном сама готовая база знаний:
+скомпилированные условия, индексы и опоры правил занимают больше, чем
+разобранный JSON (100 тыс. синтетических правил: база ~310 МБ при пике
+~335 МБ, json.load того же файла - пик ~210 МБ).
+
+JSON - обычный документ lab.json: раздел "rules" читается поэлементно.
+JSONL - по объекту в строке: строка с полями conditions/actions - это
+правило, любая другая - набор разделов (например, {"questions": {...}}).
+"""
+
+import argparse
+import codecs
+import hashlib
+import json
+import re
+import sys
+import time
+import tracemalloc
+from collections.abc import Mapping
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1 << 16
+STREAMED = 'rules'
+
+_WS = re.compile(r'[ \t\r\n]*')
+_DECODER = json.JSONDecoder()
+
+
+class ChunkReader:
+    """Текст файла кусками; попутно считает sha256 и размер исходных байтов."""
+
+    def __init__(self, f: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.sha = hashlib.sha256()
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.size = 0
+        self.eof = False
+
+    def read(self) -> str:
+        data = self.f.read(self.chunk_size)
+        self.sha.update(data)
+        self.size += len(data)
+        self.eof = not data
+        return self.decoder.decode(data, final=self.eof)
+
+    def hexdigest(self) -> str:
+        return self.sha.hexdigest()
+
+
+class JsonScanner:
+    """Разбор JSON-значений из буфера, который дочитывается по мере надобности."""
+
+    def __init__(self, reader: ChunkReader, source: str = '<stream>',
+                 object_pairs_hook: Optional[Callable] = None):
+        self.reader = reader
+        self.source = source
+        self.decoder = (json.JSONDecoder(object_pairs_hook=object_pairs_hook)
+                        if object_pairs_hook is not None else _DECODER)
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0  # сколько символов уже отброшено из начала буфера
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"{self.source}: {message} (символ {self.offset + self.pos})")
+
+    def _more(self) -> bool:
+        """Дочитывает кусок, отбрасывая разобранное начало буфера."""
+        if self.reader.eof:
+            return False
+        chunk = self.reader.read()
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Следующий значащий символ ('' в конце файла)."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self.error(f"ожидался {char!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Очередное JSON-значение целиком."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Значение могло оборваться на границе куска
+                if self._more():
+                    continue
+                raise self.error(f"некорректный JSON: {e.msg}") from None
+            # Число в конце буфера могло быть обрезано - дочитываем и повторяем
+            if end < len(self.buf) or not self._more():
+                self.pos = end
+                return value
+
+    def items(self) -> Iterator[Any]:
+        """Элементы массива по одному (открывающая скобка уже прочитана)."""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            if sep not in (',', ']'):
+                raise self.error("ожидалась ',' или ']'")
+            self.pos += 1
+            if sep == ']':
+                return
+
+
+def iter_json(reader: ChunkReader, source: str = '<stream>',
+              object_pairs_hook: Optional[Callable] = None) -> Iterator[Tuple[str, Any]]:
+    """Разделы JSON-документа: (имя, значение); для STREAMED - итератор элементов.
+
+    Итератор нужно исчерпать до перехода к следующему разделу.
+    """
+    scanner = JsonScanner(reader, source, object_pairs_hook)
+    scanner.expect('{')
+    if scanner.peek() == '}':
+        scanner.pos += 1
+    else:
+        while True:
+            key = scanner.value()
+            if not isinstance(key, str):
+                raise scanner.error("ожидалось имя раздела")
+            scanner.expect(':')
+            if key == STREAMED and scanner.peek() == '[':
+                scanner.pos += 1
+                items = scanner.items()
+                yield key, items
+                for _ in items:
+                    pass
+            else:
+                yield key, scanner.value()
+            sep = scanner.peek()
+            if sep not in (',', '}'):
+                raise scanner.error("ожидалась ',' или '}'")
+            scanner.pos += 1
+            if sep == '}':
+                break
+    if scanner.peek():
+        raise scanner.error("лишние данные после документа")
+
+
+def iter_jsonl(reader: ChunkReader, source: str = '<stream>',
+               object_pairs_hook: Optional[Callable] = None) -> Iterator[Tuple[str, Any]]:
+    """Разделы JSONL-файла: правило даёт (STREAMED, (правило,)), прочие строки - свои разделы."""
+    tail = ''
+    line_no = 0
+    while not reader.eof:
+        lines = (tail + reader.read()).split('\n')
+        tail = lines.pop() if not reader.eof else ''
+        for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line, object_pairs_hook=object_pairs_hook)
+            except ValueError as e:
+                raise ValueError(f"{source}:{line_no}: некорректный JSON: {e}") from None
+            if not isinstance(obj, Mapping):
+                raise ValueError(f"{source}:{line_no}: ожидался объект")
+            if 'conditions' in obj or 'actions' in obj:
+                yield STREAMED, (obj,)
+            else:
+                yield from obj.items()
+
+
+def read_sections(f: BinaryIO, source: str = '<stream>', jsonl: bool = False,
+                  object_pairs_hook: Optional[Callable] = None
+                  ) -> Tuple[ChunkReader, Iterator[Tuple[str, Any]]]:
+    """Читатель файла (для sha256 и размера) и поток его разделов."""
+    reader = ChunkReader(f)
+    return reader, (iter_jsonl if jsonl else iter_json)(reader, source, object_pairs_hook)
+
+
+def main():
+    from knowledge_base import KnowledgeBase
+
+    parser = argparse.ArgumentParser(description="Потоковая загрузка базы знаний")
+    parser.add_argument('rules', nargs='?', default='lab.json', help="файл .json или .jsonl")
+    parser.add_argument('--memory', action='store_true', help="замерить пик памяти (медленнее)")
+    args = parser.parse_args()
+
+    if args.memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    kb = KnowledgeBase.load(args.rules)
+    elapsed = time.perf_counter() - start
+    line = (f"{kb.source}: правил {len(kb.rules)}, вопросов {len(kb.questions)}, "
+            f"{kb.load_stats['bytes'] / 2**20:.1f} МБ за {elapsed:.2f} с")
+    if args.memory:
+        line += f", пик памяти {tracemalloc.get_traced_memory()[1] / 2**20:.1f} МБ"
+        tracemalloc.stop()
+    print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
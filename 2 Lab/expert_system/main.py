@@ -1,18 +1,32 @@
-"""Точка входа в программу."""
+"""Точка входа в программу.
 
+    python main.py                   # анкета
+    python main.py compile lab.json  # скомпилировать базу знаний в lab.kbc
+"""
+
+import sys
+
+import artifact
 from engine import RuleEngine
 
 
 def main():
+    if sys.argv[1:2] == ['compile']:
+        artifact.main(sys.argv[2:])
+        return
+
     try:
-        engine = RuleEngine('lab.json')
+        # База знаний читается один раз (из lab.kbc, если он свежий)
+        # и используется всеми сеансами
+        kb = artifact.load_knowledge_base('lab.json')
+        engine = RuleEngine(kb)
         engine.run()
 
         while True:
             again = input("\nНовый анализ? (да/нет): ").lower()
             if again in ['да', 'д', 'yes', 'y']:
                 print("\n" + "=" * 50)
-                engine = RuleEngine('lab.json')
+                engine = RuleEngine(kb)
                 engine.run()
             else:
                 print("\nДо свидания!")
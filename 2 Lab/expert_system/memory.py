@@ -1,20 +1,153 @@
 """Модуль для работы с памятью и выводом результатов."""
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Mapping, Set
+
+from factstore import FactStore
+
+
+class PendingQuestion(ValueError):
+    """Ответа на вопрос ещё нет: сеанс должен дождаться его и повторить вывод."""
+
+    def __init__(self, qid: str):
+        super().__init__(f"Нет ответа на вопрос: {qid}")
+        self.qid = qid
+
+
+def normalize_answer(qid: str, q: Mapping, ans: Any) -> Any:
+    """Проверяет ответ на вопрос q и приводит его к каноническому виду."""
+    if q['type'] == 'boolean':
+        if isinstance(ans, bool):
+            return ans
+        if str(ans).lower() in ['да', 'д', 'yes', 'y', '1']:
+            return True
+        if str(ans).lower() in ['нет', 'н', 'no', 'n', '0']:
+            return False
+
+    elif q['type'] == 'integer':
+        # Только целое число или строка с ним: 3.7 и true - не ответ
+        try:
+            if isinstance(ans, bool) or not isinstance(ans, (int, str)):
+                raise TypeError
+            val = int(ans)
+        except (TypeError, ValueError):
+            raise ValueError(f"Ответ на {qid} должен быть целым числом: {ans!r}")
+        if q.get('validation') == 'min_0' and val < 0:
+            raise ValueError(f"Ответ на {qid} должен быть >= 0: {val}")
+        if q.get('validation') == 'range_1_5' and not (1 <= val <= 5):
+            raise ValueError(f"Ответ на {qid} должен быть от 1 до 5: {val}")
+        return val
+
+    elif q['type'] == 'choice':
+        if ans in q['options']:
+            # Возвращаем вариант из базы знаний - он интернирован
+            return q['options'][q['options'].index(ans)]
+
+    raise ValueError(f"Недопустимый ответ на {qid}: {ans!r}")
 
 
 class Memory:
     """Управление памятью системы."""
 
-    def __init__(self, rules, questions, initial_facts, mbti_mapping):
-        self.rules = rules
-        self.questions = questions
-        self.facts = initial_facts
-        self.mbti_map = mbti_mapping
+    # Память создаётся на каждый сеанс: без __dict__ и без пустых
+    # структур, которые нужны не каждому сопоставителю и стратегии
+    __slots__ = ('kb', 'rules', 'questions', 'facts', 'mbti_map', 'asked', 'answers',
+                 'listeners', 'rule_index', 'dirty', 'clock', 'stamps', 'rule',
+                 'justifications')
+
+    def __init__(self, kb, answers=None):
+        # Общая неизменяемая база знаний; в сеансе копируются только факты
+        self.kb = kb
+        self.rules = kb.rules
+        self.questions = kb.questions
+        self.facts = FactStore(kb.schema, kb.initial_facts)
+        self.mbti_map = kb.mbti_mapping
         self.asked = set()
+        # Заранее известные ответы (пакетный режим без input())
+        if answers is not None and not isinstance(answers, Mapping):
+            raise ValueError(f"Ответы должны быть JSON-объектом, а не {type(answers).__name__}")
+        self.answers = answers
+        self.listeners = ()  # вызываются при каждом изменении факта
+
+        # Индекс зависимостей: имя факта -> правила, чьи условия его упоминают
+        self.rule_index = kb.rule_index
+        # Факты, изменившиеся с прошлого сопоставления; множество заводит
+        # сопоставитель indexed, остальным оно не нужно
+        self.dirty = None
+        # Логические метки времени фактов; словарь заводит агенда, если
+        # стратегия опирается на свежесть фактов
+        self.clock = 0
+        self.stamps = None
+        # Поддержка истинности: правило, чьё действие сейчас выполняется,
+        # и обоснования выведенных фактов (факт -> номер правила)
+        self.rule = None
+        self.justifications: Dict[str, int] = {}
+
+    def set_fact(self, name: str, value: Any):
+        """Записывает факт, помечает его изменённым и уведомляет подписчиков."""
+        self.facts[name] = value
+        if self.rule is not None:
+            self.justifications[name] = self.rule
+        if self.dirty is not None:
+            self.dirty.add(name)
+        self.clock += 1
+        if self.stamps is not None:
+            self.stamps[name] = self.clock
+        for listener in self.listeners:
+            listener(name)
+
+    def set_answer(self, name: str, value: Any):
+        """Записывает ответ пользователя - исходный факт без обоснования."""
+        rule, self.rule = self.rule, None
+        try:
+            self.set_fact(name, value)
+        finally:
+            self.rule = rule
+        self.justifications.pop(name, None)
+
+    def dependents(self, name: str, retracted: bool) -> List[str]:
+        """Выведенные факты, теряющие обоснование при изменении факта name.
+
+        При смене значения затрагиваются правила, читавшие значение; при
+        отмене (retracted) - ещё и проверявшие лишь наличие факта. Каждый
+        потерянный факт считается отменённым и распространяется дальше.
+        """
+        supports = self.kb.supports
+        changed = {name}
+        gone = {name} if retracted else set()
+        lost = []
+        grew = True
+        while grew:
+            grew = False
+            for fact, rule in self.justifications.items():
+                if fact in gone:
+                    continue
+                value, presence = supports[rule]
+                if not value.isdisjoint(changed) or not presence.isdisjoint(gone):
+                    gone.add(fact)
+                    changed.add(fact)
+                    lost.append(fact)
+                    grew = True
+        return lost
+
+    def retract(self, names: Iterable[str]):
+        """Удаляет факты вместе с их обоснованиями."""
+        for name in names:
+            self.justifications.pop(name, None)
+            self.set_fact(name, None)
+
+    def candidate_rules(self) -> Set[int]:
+        """Забирает изменённые факты и возвращает номера затронутых правил."""
+        candidates = set()
+        for name in self.dirty:
+            candidates.update(self.rule_index.get(name, ()))
+        self.dirty.clear()
+        return candidates
 
     def ask_question(self, qid: str) -> Any:
         """Задает вопрос пользователю."""
+        if self.answers is not None:
+            return self.answer_from(qid, self.answers)
+
         q = self.questions[qid]
         print(f"\n{q['text']}")
 
@@ -51,6 +184,12 @@ class Memory:
                 if ans in q['options']:
                     return ans
 
+    def answer_from(self, qid: str, answers: Dict) -> Any:
+        """Берёт и проверяет ответ из готового набора ответов."""
+        if qid not in answers:
+            raise PendingQuestion(qid)
+        return normalize_answer(qid, self.questions[qid], answers[qid])
+
     def print_results(self):
         """Выводит результаты анализа."""
         print("\n" + "=" * 50)
@@ -0,0 +1,265 @@
+"""Полная таблица итогов анализа и её компактный бинарный формат.
+
+Пример запуска:
+    python outcomes.py outcomes.bin --workers 4
+
+Перебираются все сочетания ответов на вопросы плана опроса, каждое
+прогоняется через RuleEngine на пуле процессов. Одинаковые итоги
+склеиваются (факты-ответы в итог не входят - они восстанавливаются
+по индексу); в файл пишется индекс ответов -> номер итога и пул
+строк без повторов. Файл открывается через mmap и читается без разбора.
+
+Формат (little-endian):
+    заголовок HEADER;
+    схема - JSON {questions: [[id, факт, [варианты...]], ...], facts: [имена...]};
+    таблица - номер итога (uint16/uint32) для каждого индекса ответов;
+    флаги итогов - по байту на итог (FLAG_CAPPED - упёрся в лимит циклов);
+    итоги - для каждого по uint32 на факт схемы: номер строки или ABSENT;
+    смещения строк - uint32, строк + 1; затем сами строки в UTF-8.
+Значения фактов хранятся как JSON-текст, поэтому числа и булевы
+значения восстанавливаются без потерь. Секции выровнены на 4 байта.
+"""
+
+import argparse
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from engine import RuleEngine
+from artifact import load_knowledge_base
+from knowledge_base import KnowledgeBase
+
+MAGIC = b'ESOT'
+VERSION = 1
+# magic, версия, ширина номера итога, сочетаний, итогов, фактов, строк,
+# длина схемы, sha256 базы знаний
+HEADER = struct.Struct('<4sHHIIIII32s')
+ABSENT = 0xFFFFFFFF
+FLAG_CAPPED = 1
+
+# База знаний процесса-обработчика (заполняется инициализатором)
+_kb: Optional[KnowledgeBase] = None
+_domains: Tuple[Tuple[str, str, Tuple], ...] = ()
+
+
+def answer_domains(kb: KnowledgeBase) -> Tuple[Tuple[str, str, Tuple], ...]:
+    """(вопрос, факт, варианты) для плана опроса; ValueError, если ответы не перечислить."""
+    domains = []
+    for qid, fact, _ in kb.question_plan:
+        q = kb.questions[qid]
+        if q['type'] == 'choice':
+            values = tuple(q['options'])
+        elif q['type'] == 'boolean':
+            values = (False, True)
+        elif q['type'] == 'integer' and q.get('validation') == 'range_1_5':
+            values = (1, 2, 3, 4, 5)
+        else:
+            raise ValueError(f"Ответы на вопрос {qid} нельзя перечислить")
+        domains.append((qid, fact, values))
+    return tuple(domains)
+
+
+def answers_at(domains: Sequence[Tuple[str, str, Tuple]], index: int) -> Dict[str, Any]:
+    """Ответы для индекса в смешанной системе счисления (последний вопрос - младший)."""
+    answers = {}
+    for qid, _, values in reversed(domains):
+        index, pos = divmod(index, len(values))
+        answers[qid] = values[pos]
+    return answers
+
+
+def _init_worker(kb: KnowledgeBase):
+    global _kb, _domains
+    _kb = kb
+    _domains = answer_domains(kb)
+
+
+def _evaluate_range(bounds: Tuple[int, int]) -> List[Tuple[str, bool]]:
+    """Итоги для индексов [start, stop): (факты в каноническом JSON, упёрся ли в лимит)."""
+    out = []
+    for index in range(*bounds):
+        engine = RuleEngine(_kb, answers=answers_at(_domains, index), verbose=False)
+        facts = dict(engine.infer())
+        for _, fact, _ in _domains:
+            facts.pop(fact, None)
+        out.append((json.dumps(facts, sort_keys=True, ensure_ascii=False), engine.capped))
+    return out
+
+
+def _pad(buf: bytearray):
+    buf.extend(b'\0' * (-len(buf) % 4))
+
+
+def build_table(kb: KnowledgeBase, workers: Optional[int] = None,
+                chunk_size: int = 500) -> Tuple[bytes, Dict[str, int]]:
+    """Перебирает все сочетания ответов; возвращает файл таблицы и сводку."""
+    domains = answer_domains(kb)
+    total = 1
+    for _, _, values in domains:
+        total *= len(values)
+
+    workers = workers or os.cpu_count() or 1
+    bounds = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+    # Склейка одинаковых итогов: (JSON фактов, флаг) -> номер итога
+    outcome_ids: Dict[Tuple[str, bool], int] = {}
+    table: List[int] = []
+    with Pool(workers, initializer=_init_worker, initargs=(kb,)) as pool:
+        for results in pool.imap(_evaluate_range, bounds):
+            for outcome in results:
+                table.append(outcome_ids.setdefault(outcome, len(outcome_ids)))
+
+    outcomes = [(json.loads(text), capped) for text, capped in outcome_ids]
+    columns = sorted({name for facts, _ in outcomes for name in facts})
+
+    strings: Dict[str, int] = {}
+    rows = []
+    for facts, _ in outcomes:
+        rows.append([strings.setdefault(json.dumps(facts[name], ensure_ascii=False), len(strings))
+                     if name in facts else ABSENT for name in columns])
+
+    schema = json.dumps({'questions': [[qid, fact, list(values)] for qid, fact, values in domains],
+                         'facts': columns}, ensure_ascii=False).encode('utf-8')
+    width = 2 if len(outcomes) <= 0xFFFF else 4
+
+    buf = bytearray(HEADER.pack(MAGIC, VERSION, width, total, len(outcomes), len(columns),
+                                len(strings), len(schema), bytes.fromhex(kb.digest)))
+    buf += schema
+    _pad(buf)
+    buf += struct.pack(f'<{total}{"H" if width == 2 else "I"}', *table)
+    _pad(buf)
+    buf += bytes(FLAG_CAPPED if capped else 0 for _, capped in outcomes)
+    _pad(buf)
+    buf += struct.pack(f'<{len(outcomes) * len(columns)}I', *itertools.chain.from_iterable(rows))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    buf += struct.pack(f'<{len(offsets)}I', *offsets)
+    buf += b''.join(encoded)
+
+    summary = {'combinations': total, 'outcomes': len(outcomes), 'strings': len(strings),
+               'capped': sum(1 for index in table if outcomes[index][1]), 'bytes': len(buf)}
+    return bytes(buf), summary
+
+
+class OutcomeTable:
+    """Таблица итогов, открытая через mmap; поиск - одно чтение из памяти."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, width, self.combinations, self.count, n_columns, n_strings,
+         schema_len, digest) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: не таблица итогов версии {VERSION}")
+        self.digest = digest.hex()
+
+        pos = HEADER.size
+        schema = json.loads(bytes(self.mm[pos:pos + schema_len]).decode('utf-8'))
+        pos += schema_len + (-schema_len % 4)
+        self.domains = tuple((qid, fact, tuple(values)) for qid, fact, values in schema['questions'])
+        self.columns = tuple(schema['facts'])
+        # Для каждого вопроса: значение -> позиция и вес разряда индекса
+        self.positions = []
+        stride = 1
+        for qid, _, values in reversed(self.domains):
+            self.positions.append((qid, {v: i for i, v in enumerate(values)}, stride))
+            stride *= len(values)
+        self.positions.reverse()
+
+        view = memoryview(self.mm)
+        size = self.combinations * width
+        self.table = view[pos:pos + size].cast('H' if width == 2 else 'I')
+        pos += size + (-size % 4)
+        self.flags = view[pos:pos + self.count]
+        pos += self.count + (-self.count % 4)
+        size = self.count * n_columns * 4
+        self.rows = view[pos:pos + size].cast('I')
+        pos += size
+        size = (n_strings + 1) * 4
+        self.offsets = view[pos:pos + size].cast('I')
+        self.blob = pos + size
+
+    def index(self, answers: Dict[str, Any]) -> int:
+        """Индекс сочетания ответов; значения - в каноническом виде (см. normalize_answer)."""
+        index = 0
+        for qid, positions, stride in self.positions:
+            if qid not in answers:
+                raise ValueError(f"Нет ответа на вопрос: {qid}")
+            pos = positions.get(answers[qid])
+            if pos is None:
+                raise ValueError(f"Недопустимый ответ на {qid}: {answers[qid]!r}")
+            index += pos * stride
+        return index
+
+    def outcome_id(self, index: int) -> int:
+        """Номер итога для индекса ответов."""
+        return self.table[index]
+
+    def capped(self, outcome: int) -> bool:
+        """Упёрся ли вывод для этого итога в лимит циклов."""
+        return bool(self.flags[outcome] & FLAG_CAPPED)
+
+    def string(self, sid: int) -> str:
+        """Строка пула по номеру."""
+        start, end = self.offsets[sid], self.offsets[sid + 1]
+        return self.mm[self.blob + start:self.blob + end].decode('utf-8')
+
+    def facts(self, outcome: int) -> Dict[str, Any]:
+        """Выведенные факты по номеру итога (без фактов-ответов)."""
+        n = len(self.columns)
+        row = self.rows[outcome * n:(outcome + 1) * n]
+        return {name: json.loads(self.string(sid))
+                for name, sid in zip(self.columns, row) if sid != ABSENT}
+
+    def lookup(self, answers: Dict[str, Any]) -> Dict[str, Any]:
+        """Итоговые факты для ответов, как у RuleEngine.infer()."""
+        facts = self.facts(self.table[self.index(answers)])
+        for qid, fact, _ in self.domains:
+            facts[fact] = answers[qid]
+        return facts
+
+    def close(self):
+        for view in (self.table, self.flags, self.rows, self.offsets):
+            view.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Полная таблица итогов анализа")
+    parser.add_argument('output', help="файл таблицы")
+    parser.add_argument('--rules', default='lab.json', help="база знаний")
+    parser.add_argument('--workers', '-j', type=int, default=None, help="число процессов")
+    args = parser.parse_args()
+
+    kb = load_knowledge_base(args.rules)
+    start = time.perf_counter()
+    data, summary = build_table(kb, args.workers)
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    elapsed = time.perf_counter() - start
+
+    print(f"Сочетаний: {summary['combinations']}, итогов: {summary['outcomes']}, "
+          f"строк: {summary['strings']}, размер: {summary['bytes']} байт, "
+          f"за {elapsed:.2f} с", file=sys.stderr)
+    if summary['capped']:
+        print(f"Внимание: {summary['capped']} сочетаний упёрлись в лимит циклов",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Планирование опроса: граф зависимостей вопросов от выводов базы знаний."""
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from conditions import Compiled
+
+
+# Элемент плана: (id вопроса, факт-ответ, действие ask_user)
+Step = Tuple[str, str, Mapping]
+
+# Действия, для которых известно, какой факт они записывают
+WRITERS = ('assert', 'ask_user')
+
+
+def relevant_facts(rules: Iterable[Mapping], compiled: Tuple[Tuple[Compiled, ...], ...],
+                   goals: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+    """Факты, от которых зависит хотя бы одна цель.
+
+    Цели - раздел goals базы знаний, а без него факты, которые не читает
+    ни одно другое правило. Правила с пользовательскими действиями тоже считаются
+    целевыми (их входы заранее неизвестны). От целей идём назад: условия
+    правила, записывающего нужный факт, тоже нужны.
+    """
+    rules = list(rules)
+    if goals is None:
+        # Проверка правилом собственного результата ("ещё не выведен")
+        # не делает факт промежуточным
+        read = set()
+        for rule, conds in zip(rules, compiled):
+            written = {action.get('fact') for action in rule['actions']}
+            read.update(cond[0] for cond in conds if cond[0] not in written)
+        goals = {action['fact'] for rule in rules for action in rule['actions']
+                 if action['type'] in WRITERS and action['fact'] not in read}
+
+    writers: Dict[str, List[int]] = {}
+    stack: List[str] = list(goals)
+    for idx, rule in enumerate(rules):
+        for action in rule['actions']:
+            if action['type'] in WRITERS:
+                writers.setdefault(action['fact'], []).append(idx)
+            else:
+                stack.extend(cond[0] for cond in compiled[idx])
+
+    relevant: Set[str] = set()
+    while stack:
+        fact = stack.pop()
+        if fact in relevant:
+            continue
+        relevant.add(fact)
+        for idx in writers.get(fact, ()):
+            stack.extend(cond[0] for cond in compiled[idx])
+    return frozenset(relevant)
+
+
+def plan_questions(rules: Iterable[Mapping], compiled: Tuple[Tuple[Compiled, ...], ...],
+                   goals: Optional[Iterable[str]] = None) -> Tuple[Tuple[Step, ...], FrozenSet[str]]:
+    """Возвращает порядок полезных вопросов и множество пропускаемых."""
+    rules = list(rules)
+    relevant = relevant_facts(rules, compiled, goals)
+
+    order: List[Step] = []
+    skipped: Set[str] = set()
+    seen: Set[str] = set()
+    for rule in rules:
+        for action in rule['actions']:
+            if action['type'] != 'ask_user' or action['question'] in seen:
+                continue
+            seen.add(action['question'])
+            if action['fact'] in relevant:
+                order.append((action['question'], action['fact'], action))
+            else:
+                skipped.add(action['question'])
+    return tuple(order), frozenset(skipped)
+
+
+class QuestionCursor:
+    """Курсор сеанса по плану опроса: следующий вопрос за O(1) амортизированно."""
+
+    __slots__ = ('plan', 'memory', 'pos')
+
+    def __init__(self, plan: Tuple[Step, ...], memory):
+        self.plan = plan
+        self.memory = memory
+        self.pos = 0
+
+    def next(self) -> Optional[Mapping]:
+        """Действие ask_user для следующего незаданного вопроса или None."""
+        plan, facts, asked = self.plan, self.memory.facts, self.memory.asked
+        pos = self.pos
+        while pos < len(plan):
+            qid, fact, action = plan[pos]
+            pos += 1
+            if qid not in asked and facts.get(fact) is None:
+                self.pos = pos
+                return action
+        self.pos = pos
+        return None
+
+    def reset(self):
+        """Начинает план сначала (после отмены ответов)."""
+        self.pos = 0
+
+    def retry(self):
+        """Возвращает курсор к последнему выданному вопросу: ответа на него нет."""
+        self.pos -= 1
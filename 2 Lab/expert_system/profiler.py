@@ -0,0 +1,147 @@
+"""Профилирование движка: счётчики и время по каждому правилу.
+
+Профилировщик подключается к сеансу через RuleEngine(profiler=...) и
+подменяет на экземпляре check_rule, execute_action, run_cycle и
+agenda.pop обёртками со счётчиками. Без профилировщика движок работает
+с исходными методами, поэтому отключённое профилирование ничего не стоит.
+Один профилировщик можно передавать многим сеансам - счётчики
+суммируются; в конце пакета выводится отчёт или снимок для Prometheus.
+
+В режиме rete условия проверяются в альфа-узлах, а не через check_rule,
+поэтому попытки сопоставления по правилам там не считаются (время
+попадает в общее время циклов).
+"""
+
+import time
+from typing import Dict, List
+
+# Столбцы отчёта: атрибут -> заголовок
+COLUMNS = (
+    ('attempts', 'проверок'),
+    ('matches', 'успешных'),
+    ('fired', 'срабатываний'),
+    ('match_ns', 'сопост., мкс'),
+    ('action_ns', 'действия, мкс'),
+)
+
+
+def _label_value(value: str) -> str:
+    """Экранирует значение метки Prometheus: обратная косая, кавычка, перевод строки."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RuleProfiler:
+    """Накопитель счётчиков по правилам одной базы знаний."""
+
+    def __init__(self, kb):
+        n = len(kb.rules)
+        self.rule_ids = tuple(rule['id'] for rule in kb.rules)
+        self.index = {rid: idx for idx, rid in enumerate(self.rule_ids)}
+        self.attempts = [0] * n
+        self.matches = [0] * n
+        self.fired = [0] * n
+        self.match_ns = [0] * n
+        self.action_ns = [0] * n
+        self.sessions = 0
+        self.cycles = 0
+        self.cycle_ns = 0
+
+    def attach(self, engine):
+        """Подменяет методы сеанса обёртками со счётчиками."""
+        clock = time.perf_counter_ns
+        check_rule = engine.check_rule
+        execute_action = engine.execute_action
+        run_cycle = engine.run_cycle
+        pop = engine.agenda.pop
+        index = self.index
+
+        def profiled_check(idx: int) -> bool:
+            start = clock()
+            ok = check_rule(idx)
+            self.match_ns[idx] += clock() - start
+            self.attempts[idx] += 1
+            if ok:
+                self.matches[idx] += 1
+            return ok
+
+        def profiled_action(action, rule_id=None):
+            start = clock()
+            try:
+                return execute_action(action, rule_id)
+            finally:
+                idx = index.get(rule_id)
+                if idx is not None:
+                    self.action_ns[idx] += clock() - start
+
+        def profiled_cycle() -> bool:
+            start = clock()
+            try:
+                return run_cycle()
+            finally:
+                self.cycle_ns += clock() - start
+                self.cycles += 1
+
+        def profiled_pop() -> int:
+            idx = pop()
+            self.fired[idx] += 1
+            return idx
+
+        engine.check_rule = profiled_check
+        engine.execute_action = profiled_action
+        engine.run_cycle = profiled_cycle
+        engine.agenda.pop = profiled_pop
+        self.sessions += 1
+
+    def rows(self, sort: str = 'match_ns') -> List[Dict]:
+        """Строки по правилам с ненулевыми счётчиками, по убыванию sort."""
+        rows = []
+        for idx, rid in enumerate(self.rule_ids):
+            row = {'rule': rid}
+            for attr, _ in COLUMNS:
+                row[attr] = getattr(self, attr)[idx]
+            if row['attempts'] or row['fired']:
+                rows.append(row)
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows
+
+    def report(self, sort: str = 'match_ns', top: int = 20) -> str:
+        """Текстовый отчёт по самым затратным правилам."""
+        lines = [f"Сеансов: {self.sessions}, циклов: {self.cycles}, "
+                 f"время циклов: {self.cycle_ns / 1e6:.1f} мс"]
+        width = max([len(rid) for rid in self.rule_ids] + [7])
+        lines.append(f"{'правило':<{width}} " + " ".join(f"{title:>14}" for _, title in COLUMNS))
+        for row in self.rows(sort)[:top]:
+            cells = []
+            for attr, _ in COLUMNS:
+                value = row[attr]
+                cells.append(f"{value / 1000:14.1f}" if attr.endswith('_ns') else f"{value:14d}")
+            lines.append(f"{row['rule']:<{width}} " + " ".join(cells))
+        return "\n".join(lines)
+
+    def prometheus(self, prefix: str = 'expert_system') -> str:
+        """Снимок счётчиков в текстовом формате Prometheus."""
+        lines = []
+
+        def metric(name: str, help_text: str, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        metric('sessions_total', "Sessions run with profiling", [('', self.sessions)])
+        metric('cycles_total', "Activation cycles", [('', self.cycles)])
+        metric('cycle_seconds_total', "Time spent in run_cycle", [('', self.cycle_ns / 1e9)])
+
+        per_rule = (
+            ('rule_match_attempts_total', "Rule condition checks", 'attempts', 1),
+            ('rule_matches_total', "Successful rule condition checks", 'matches', 1),
+            ('rule_firings_total', "Rule activations executed", 'fired', 1),
+            ('rule_match_seconds_total', "Time spent checking rule conditions", 'match_ns', 1e9),
+            ('rule_action_seconds_total', "Time spent in rule actions", 'action_ns', 1e9),
+        )
+        for name, help_text, attr, scale in per_rule:
+            values = getattr(self, attr)
+            metric(name, help_text, [
+                (f'{{rule="{_label_value(str(rid))}"}}', values[idx] / scale if scale != 1 else values[idx])
+                for idx, rid in enumerate(self.rule_ids)])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,76 @@
+"""Инкрементальное сопоставление правил (упрощённая сеть Rete)."""
+
+from typing import AbstractSet, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from conditions import Compiled
+
+
+class AlphaNode:
+    """Альфа-узел: проверка одного условия одного правила."""
+
+    __slots__ = ('rule', 'cond', 'satisfied')
+
+    def __init__(self, rule: int, cond: Compiled):
+        self.rule = rule
+        self.cond = cond
+        self.satisfied = False
+
+
+class ReteMatcher:
+    """Дискриминационная сеть для правил из lab.json.
+
+    Альфа-память сгруппирована по имени факта: при изменении факта
+    перепроверяются только условия, которые его упоминают. Бета-соединение
+    правила сводится к счётчику невыполненных условий - правило попадает
+    в конфликтное множество, когда счётчик обнуляется.
+
+    key переводит имя изменившегося факта в первый элемент условия
+    (например, в номер слота); по умолчанию условия ссылаются на имена.
+    Правила из skip в сеть не входят и никогда не активируются.
+    """
+
+    def __init__(self, rules: List[Dict], compiled: Sequence[Tuple[Compiled, ...]],
+                 memory, check: Callable[[Compiled], bool],
+                 key: Optional[Callable[[str], Any]] = None,
+                 skip: AbstractSet[int] = frozenset()):
+        self.rules = rules
+        self.check = check
+        self.key = key
+        self.alpha: Dict[Any, List[AlphaNode]] = {}
+        self.missing = [0] * len(rules)
+        self.conflict_set = set()
+
+        for idx, conds in enumerate(compiled):
+            if idx in skip:
+                continue
+            for cond in conds:
+                node = AlphaNode(idx, cond)
+                node.satisfied = check(cond)
+                if not node.satisfied:
+                    self.missing[idx] += 1
+                self.alpha.setdefault(cond[0], []).append(node)
+            if self.missing[idx] == 0:
+                self.conflict_set.add(idx)
+
+        memory.listeners += (self.on_fact,)
+
+    def on_fact(self, name: str):
+        """Распространяет изменение факта по альфа- и бета-узлам."""
+        key = self.key(name) if self.key is not None else name
+        for node in self.alpha.get(key, ()):
+            ok = self.check(node.cond)
+            if ok == node.satisfied:
+                continue
+            node.satisfied = ok
+            if ok:
+                self.missing[node.rule] -= 1
+                if self.missing[node.rule] == 0:
+                    self.conflict_set.add(node.rule)
+            else:
+                if self.missing[node.rule] == 0:
+                    self.conflict_set.discard(node.rule)
+                self.missing[node.rule] += 1
+
+    def activations(self) -> List[int]:
+        """Номера активированных правил в порядке следования в базе знаний."""
+        return sorted(self.conflict_set)
@@ -0,0 +1,310 @@
+"""Асинхронный сервис анкетирования поверх RuleEngine.
+
+Пример запуска:
+    python service.py serve --port 8765
+    python service.py client --port 8765
+
+Протокол - по одному JSON-объекту в строке в обе стороны:
+    {"op": "start"}                              -> {"session", "question"}
+    {"op": "answer", "session", "value"}         -> {"question"} или {"done", "facts"}
+    {"op": "close", "session"}                   -> {"closed"}
+    {"op": "stats"}                              -> {"sessions", "started", "expired"}
+Ошибки возвращаются как {"error": текст} (для неверного ответа - вместе
+с тем же вопросом).
+
+Сеанс хранит свой RuleEngine и словарь полученных ответов. Вывод
+идёт, пока движок не запросит неизвестный ответ (PendingQuestion);
+тогда корутина сеанса ждёт в ask_question future, который разрешает
+следующий запрос "answer", и продолжает вывод с прерванного правила -
+уже выполненные циклы не повторяются.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from engine import RuleEngine
+from artifact import load_knowledge_base
+from knowledge_base import KnowledgeBase
+from memory import PendingQuestion, normalize_answer
+
+
+def question_view(kb: KnowledgeBase, qid: str) -> Dict[str, Any]:
+    """Описание вопроса для клиента."""
+    q = kb.questions[qid]
+    view = {'id': qid, 'text': q['text'], 'type': q['type']}
+    if 'options' in q:
+        view['options'] = list(q['options'])
+    if 'explanation' in q:
+        view['explanation'] = q['explanation']
+    return view
+
+
+class Session:
+    """Незавершённая анкета: ответы и ожидание следующего."""
+
+    __slots__ = ('sid', 'kb', 'answers', 'engine', 'pending', 'waiter', 'signal', 'task', 'touched')
+
+    def __init__(self, sid: str, kb: KnowledgeBase):
+        self.sid = sid
+        self.kb = kb
+        self.answers: Dict[str, Any] = {}
+        # Движок читает ответы из того же словаря, что пополняет сеанс
+        self.engine = RuleEngine(kb, answers=self.answers, verbose=False)
+        self.pending: Optional[str] = None  # вопрос, на который ждём ответ
+        self.waiter: Optional[asyncio.Future] = None  # ответ на pending
+        self.signal: Optional[asyncio.Future] = None  # следующее событие сеанса
+        self.task: Optional[asyncio.Task] = None
+        self.touched = time.monotonic()
+
+    def step(self) -> Dict:
+        """Продолжает вывод с известными ответами; PendingQuestion - нужен ещё ответ."""
+        return dict(self.engine.infer())
+
+    def _notify(self, kind: str, value: Any):
+        if self.signal is not None and not self.signal.done():
+            self.signal.set_result((kind, value))
+
+    def _finished(self, task: asyncio.Task):
+        if task.cancelled():
+            self._notify('error', "Сеанс прерван")
+        elif task.exception() is not None:
+            self._notify('error', str(task.exception()))
+        else:
+            self._notify('done', task.result())
+
+    async def ask_question(self, qid: str) -> Any:
+        """Ждёт ответ на вопрос, не блокируя цикл событий."""
+        self.pending = qid
+        self.waiter = asyncio.get_running_loop().create_future()
+        self._notify('question', qid)
+        try:
+            return await self.waiter
+        finally:
+            self.pending = None
+            self.waiter = None
+
+    async def run(self) -> Dict:
+        """Корутина сеанса: задаёт вопросы, пока вывод не завершится."""
+        while True:
+            try:
+                return self.step()
+            except PendingQuestion as p:
+                qid = p.qid
+            # Ждём вне except: иначе исключение держало бы в памяти
+            # трассу стека прерванного вывода
+            self.answers[qid] = await self.ask_question(qid)
+
+    async def advance(self) -> Tuple[str, Any]:
+        """Возобновляет сеанс до следующего события: ('question', id),
+        ('done', факты) или ('error', текст)."""
+        self.signal = asyncio.get_running_loop().create_future()
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+            self.task.add_done_callback(self._finished)
+        try:
+            return await self.signal
+        finally:
+            self.signal = None
+
+    def answer(self, value: Any):
+        """Передаёт ответ ожидающему сеансу; ValueError при недопустимом ответе."""
+        if self.waiter is None or self.waiter.done():
+            raise ValueError("Сеанс не ждёт ответа")
+        qid = self.pending
+        self.waiter.set_result(normalize_answer(qid, self.kb.questions[qid], value))
+
+
+class QuestionnaireService:
+    """Хранилище сеансов и обработчик запросов протокола."""
+
+    def __init__(self, kb: KnowledgeBase, ttl: float = 600.0):
+        self.kb = kb
+        self.ttl = ttl  # сеанс без запросов дольше ttl секунд удаляется
+        self.sessions: Dict[str, Session] = {}
+        self.ids = itertools.count(1)
+        self.started = 0
+        self.expired = 0
+
+    async def _advance(self, session: Session) -> Dict:
+        """Ждёт от сеанса следующий вопрос или итог."""
+        kind, value = await session.advance()
+        if kind == 'question':
+            return {'session': session.sid, 'question': question_view(self.kb, value)}
+        self._drop(session.sid)
+        if kind == 'error':
+            return {'session': session.sid, 'error': value}
+        return {'session': session.sid, 'done': True, 'facts': value}
+
+    def _drop(self, sid: str):
+        session = self.sessions.pop(sid, None)
+        if session is not None and session.task is not None and not session.task.done():
+            session.task.cancel()
+
+    def _session(self, request: Dict) -> Session:
+        sid = request.get('session')
+        if not isinstance(sid, str):
+            raise KeyError(f"Идентификатор сеанса должен быть строкой: {sid!r}")
+        session = self.sessions.get(sid)
+        if session is None:
+            raise KeyError(f"Нет сеанса {request.get('session')!r}")
+        session.touched = time.monotonic()
+        return session
+
+    async def handle(self, request: Dict) -> Dict:
+        """Обрабатывает один запрос протокола."""
+        op = request.get('op')
+        try:
+            if op == 'start':
+                sid = str(next(self.ids))
+                session = Session(sid, self.kb)
+                self.sessions[sid] = session
+                self.started += 1
+                return await self._advance(session)
+
+            if op == 'answer':
+                session = self._session(request)
+                try:
+                    session.answer(request.get('value'))
+                except ValueError as e:
+                    reply = {'session': session.sid, 'error': str(e)}
+                    if session.pending is not None:
+                        reply['question'] = question_view(self.kb, session.pending)
+                    return reply
+                return await self._advance(session)
+
+            if op == 'close':
+                session = self._session(request)
+                self._drop(session.sid)
+                return {'session': session.sid, 'closed': True}
+
+            if op == 'stats':
+                return {'sessions': len(self.sessions), 'started': self.started,
+                        'expired': self.expired}
+
+            return {'error': f"Неизвестная операция: {op!r}"}
+        except KeyError as e:
+            return {'error': e.args[0]}
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Удаляет сеансы, простаивающие дольше ttl; возвращает их число."""
+        deadline = (now if now is not None else time.monotonic()) - self.ttl
+        stale = [sid for sid, s in self.sessions.items() if s.touched < deadline]
+        for sid in stale:
+            self._drop(sid)
+        self.expired += len(stale)
+        return len(stale)
+
+    async def reaper(self, interval: Optional[float] = None):
+        """Периодически удаляет простаивающие сеансы."""
+        interval = interval or max(self.ttl / 4, 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            self.expire()
+
+    async def connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обслуживает одно соединение: строка запроса -> строка ответа."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    reply = {'error': "Некорректный JSON"}
+                else:
+                    reply = await self.handle(request if isinstance(request, dict) else {})
+                writer.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(kb: KnowledgeBase, host: str = '127.0.0.1', port: int = 8765,
+                ttl: float = 600.0, ready: Optional[asyncio.Future] = None):
+    """Запускает сервис на локальном сокете до отмены задачи."""
+    service = QuestionnaireService(kb, ttl)
+    server = await asyncio.start_server(service.connection, host, port)
+    reaper = asyncio.ensure_future(service.reaper())
+    if ready is not None:
+        ready.set_result((service, server.sockets[0].getsockname()[1]))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reaper.cancel()
+
+
+class Client:
+    """Локальный клиент протокола (для проверки и консольного опроса)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765) -> 'Client':
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, **request) -> Dict:
+        self.writer.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def console(host: str, port: int):
+    """Проходит анкету в консоли через сервис."""
+    client = await Client.connect(host, port)
+    try:
+        reply = await client.request(op='start')
+        while 'question' in reply:
+            q = reply['question']
+            if 'error' in reply:
+                print(reply['error'])
+            print(f"\n{q['text']}")
+            if 'options' in q:
+                for i, opt in enumerate(q['options'], 1):
+                    print(f"  {i}. {opt}")
+            value = input("Ваш ответ: ").strip()
+            if 'options' in q and value.isdigit() and 1 <= int(value) <= len(q['options']):
+                value = q['options'][int(value) - 1]
+            reply = await client.request(op='answer', session=reply['session'], value=value)
+
+        if 'error' in reply:
+            print(f"Ошибка: {reply['error']}")
+        else:
+            print(f"\n{reply['facts'].get('integrated_report', '')}")
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервис анкетирования")
+    parser.add_argument('mode', choices=('serve', 'client'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rules', default='lab.json', help="база знаний")
+    parser.add_argument('--ttl', type=float, default=600.0, help="время жизни простаивающего сеанса, с")
+    args = parser.parse_args()
+
+    try:
+        if args.mode == 'serve':
+            print(f"Сервис на {args.host}:{args.port}", file=sys.stderr)
+            asyncio.run(serve(load_knowledge_base(args.rules), args.host, args.port, args.ttl))
+        else:
+            asyncio.run(console(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Приёмники трассировки срабатываний правил.
+
+Событие трассировки - словарь с полями:
+    cycle   - номер цикла активации,
+    rule    - id сработавшего правила (None для прямого опроса и отмены),
+    action  - тип действия ('retract' - отмена факта вне действия),
+    delta   - изменённые факты {имя: новое значение}; у отменённого - None,
+    message - короткое сообщение для консоли (может отсутствовать).
+"""
+
+import json
+from collections import deque
+from typing import Dict, Optional
+
+
+class TraceSink:
+    """Базовый приёмник: принимает события трассировки."""
+
+    # False - обработчик действий не собирает события вовсе
+    enabled = True
+
+    def emit(self, event: Dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NullSink(TraceSink):
+    """Ничего не записывает - для пакетных прогонов на пропускную способность."""
+
+    enabled = False
+
+    def emit(self, event: Dict):
+        pass
+
+
+class ConsoleSink(TraceSink):
+    """Печатает сообщения действий, как в интерактивном режиме."""
+
+    def emit(self, event: Dict):
+        if event.get('message'):
+            print(event['message'])
+
+
+class BufferedSink(TraceSink):
+    """Копит события в памяти; limit - хранить только последние N."""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.events = deque(maxlen=limit)
+
+    def emit(self, event: Dict):
+        self.events.append(event)
+
+    def clear(self):
+        self.events.clear()
+
+
+class JsonlSink(TraceSink):
+    """Пишет события в JSONL-файл через буфер ввода-вывода."""
+
+    def __init__(self, path: str, buffering: int = 1 << 16):
+        self.file = open(path, 'a', encoding='utf-8', buffering=buffering)
+
+    def emit(self, event: Dict):
+        self.file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+NULL_SINK = NullSink()
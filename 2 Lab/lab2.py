@@ -1,7 +1,45 @@
 import json
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
+
+# Коды MBTI по 4-битному индексу: биты E/I, S/N, T/F, J/P (1 - первая буква)
+MBTI_CODES = tuple(
+    ('E' if i & 8 else 'I') + ('S' if i & 4 else 'N') + ('T' if i & 2 else 'F') + ('J' if i & 1 else 'P')
+    for i in range(16)
+)
+MBTI_INDEX = {code: i for i, code in enumerate(MBTI_CODES)}
+
+# Карьерные рекомендации по умолчанию (раздел career_recommendations
+# из lab.json имеет приоритет)
+CAREER_RECOMMENDATIONS = {
+    'INTJ': 'Научные исследования, IT-архитектура, стратегическое планирование',
+    'INFJ': 'Психология, коучинг, социальная работа',
+    'ENTP': 'Предпринимательство, маркетинг, консалтинг',
+    'ENFJ': 'Обучение, управление, общественная деятельность',
+    'ISTJ': 'Бухгалтерия, администрирование, логистика',
+    'ISFP': 'Дизайн, искусство, музыка',
+    'ESTP': 'Продажи, спорт, мероприятия',
+    'ESFJ': 'Медицина, образование, уход за людьми',
+    'ISTP': 'Технические специальности, механика',
+    'ISFJ': 'Медицина, библиотечное дело, архивирование',
+    'INTP': 'Программирование, научная работа',
+    'INFP': 'Психология, писательство, искусство',
+    'ENTJ': 'Менеджмент, политика, юриспруденция',
+    'ENFP': 'Маркетинг, PR, творческие профессии',
+    'ESTJ': 'Управление, организация, контроль',
+    'ESFP': 'Развлечения, туризм, сервис'
+}
+CAREER_FALLBACK = 'Разнообразные профессии, подходящие вашему типу личности'
+
+
+def print_event(event: Dict):
+    """Трассировка по умолчанию: печатает сообщение действия."""
+    if event.get('message'):
+        print(event['message'])
+
+
 class RuleEngine:
-    def __init__(self, rules_file: str = 'lab.json'):
+    def __init__(self, rules_file: str = 'lab.json',
+                 trace: Optional[Callable[[Dict], None]] = print_event):
         with open(rules_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
@@ -10,8 +48,21 @@ class RuleEngine:
         self.facts = data['initial_facts'].copy()
         self.asked = set()
 
+        # Трассировка срабатываний: функция, получающая событие
+        # (по умолчанию - печать в консоль); None - без трассировки
+        self.trace = trace
+        self.cycle = 0
+        self._event = None
+
         # Для MBTI
         self.mbti_map = data.get('mbti_mapping', {})
+        # Рекомендации - таблица из 16 строк по индексу MBTI
+        recommendations = data.get('career_recommendations', {})
+        careers = []
+        for code in MBTI_CODES:
+            recs = recommendations.get(code, CAREER_RECOMMENDATIONS.get(code, CAREER_FALLBACK))
+            careers.append(recs if isinstance(recs, str) else ', '.join(recs))
+        self.careers = tuple(careers)
 
     def ask(self, qid: str) -> Any:
         q = self.questions[qid]
@@ -77,32 +128,54 @@ class RuleEngine:
     def check_all(self, conditions: List[Dict]) -> bool:
         return all(self.check_condition(c) for c in conditions)
 
-    def execute_action(self, action: Dict):
+    def _set(self, name: str, value: Any):
+        self.facts[name] = value
+        if self._event is not None:
+            self._event['delta'][name] = value
+
+    def _say(self, text: str):
+        if self._event is not None:
+            self._event['message'] = text
+
+    def execute_action(self, action: Dict, rule_id: str = None):
+        if self.trace is not None:
+            self._event = {'cycle': self.cycle, 'rule': rule_id, 'action': action['type'],
+                           'delta': {}, 'message': None}
+            try:
+                self._execute(action)
+            finally:
+                event, self._event = self._event, None
+            if event['delta'] or event['message']:
+                self.trace(event)
+        else:
+            self._execute(action)
+
+    def _execute(self, action: Dict):
         atype = action['type']
 
         if atype == 'assert':
-            self.facts[action['fact']] = action['value']
-            print(f"  [Факт: {action['fact']} = {action['value']}]")
+            self._set(action['fact'], action['value'])
+            self._say(f"  [Факт: {action['fact']} = {action['value']}]")
 
         elif atype == 'ask_user':
             qid = action['question']
             fact_name = action['fact']
             if qid not in self.asked:
                 ans = self.ask(qid)
-                self.facts[fact_name] = ans
+                self._set(fact_name, ans)
                 self.asked.add(qid)
-                print(f"  [Ответ: {fact_name} = {ans}]")
+                self._say(f"  [Ответ: {fact_name} = {ans}]")
 
         elif atype == 'calculate_mbti_type':
-            # Преобразуем ответы в буквы MBTI
-            e = 'E' if self.facts.get('energy_source') == 'extraversion' else 'I'
-            s = 'S' if self.facts.get('information_processing') == 'sensing' else 'N'
-            t = 'T' if self.facts.get('decision_making') == 'thinking' else 'F'
-            j = 'J' if self.facts.get('lifestyle') == 'judging' else 'P'
+            # Ответы -> 4-битный индекс MBTI
+            idx = ((self.facts.get('energy_source') == 'extraversion') << 3
+                   | (self.facts.get('information_processing') == 'sensing') << 2
+                   | (self.facts.get('decision_making') == 'thinking') << 1
+                   | (self.facts.get('lifestyle') == 'judging'))
 
-            mbti = e + s + t + j
-            self.facts['mbti_type'] = mbti
-            print(f"  [Рассчитан тип MBTI: {mbti}]")
+            mbti = MBTI_CODES[idx]
+            self._set('mbti_type', mbti)
+            self._say(f"  [Рассчитан тип MBTI: {mbti}]")
 
         elif atype == 'generate_personality_report':
             # Собираем отчет
@@ -129,35 +202,16 @@ class RuleEngine:
                 parts.append("Черты личности:")
                 parts.extend([f"  - {item}" for item in big5])
 
-            self.facts['integrated_report'] = "\n".join(parts)
-            print("  [Создан отчет]")
+            self._set('integrated_report', "\n".join(parts))
+            self._say("  [Создан отчет]")
 
         elif atype == 'generate_career_recommendations':
             mbti = self.facts.get('mbti_type')
             if mbti:
-                # Простые рекомендации по типу
-                recommendations = {
-                    'INTJ': 'Научные исследования, IT-архитектура, стратегическое планирование',
-                    'INFJ': 'Психология, коучинг, социальная работа',
-                    'ENTP': 'Предпринимательство, маркетинг, консалтинг',
-                    'ENFJ': 'Обучение, управление, общественная деятельность',
-                    'ISTJ': 'Бухгалтерия, администрирование, логистика',
-                    'ISFP': 'Дизайн, искусство, музыка',
-                    'ESTP': 'Продажи, спорт, мероприятия',
-                    'ESFJ': 'Медицина, образование, уход за людьми',
-                    'ISTP': 'Технические специальности, механика',
-                    'ISFJ': 'Медицина, библиотечное дело, архивирование',
-                    'INTP': 'Программирование, научная работа',
-                    'INFP': 'Психология, писательство, искусство',
-                    'ENTJ': 'Менеджмент, политика, юриспруденция',
-                    'ENFP': 'Маркетинг, PR, творческие профессии',
-                    'ESTJ': 'Управление, организация, контроль',
-                    'ESFP': 'Развлечения, туризм, сервис'
-                }
-
-                rec = recommendations.get(mbti, 'Разнообразные профессии, подходящие вашему типу личности')
-                self.facts['career_recommendation'] = rec
-                print(f"  [Созданы карьерные рекомендации]")
+                idx = MBTI_INDEX.get(mbti)
+                rec = self.careers[idx] if idx is not None else CAREER_FALLBACK
+                self._set('career_recommendation', rec)
+                self._say(f"  [Созданы карьерные рекомендации]")
 
         elif atype == 'generate_communication_recommendations':
             e_type = self.facts.get('personality_category')
@@ -173,8 +227,8 @@ class RuleEngine:
             else:
                 comm += '. Ориентируетесь на идеи и общую картину в общении.'
 
-            self.facts['communication_recommendation'] = comm
-            print("  [Созданы рекомендации по общению]")
+            self._set('communication_recommendation', comm)
+            self._say("  [Созданы рекомендации по общению]")
 
         elif atype == 'generate_growth_recommendations':
             mbti = self.facts.get('mbti_type', '')
@@ -194,10 +248,11 @@ class RuleEngine:
             if stability < 3:
                 rec.append('Работайте над эмоциональной устойчивостью')
 
-            self.facts['growth_recommendation'] = '; '.join(rec) if rec else 'Развивайте сильные стороны вашего типа'
-            print("  [Созданы рекомендации для роста]")
+            self._set('growth_recommendation', '; '.join(rec) if rec else 'Развивайте сильные стороны вашего типа')
+            self._say("  [Созданы рекомендации для роста]")
 
     def run_cycle(self) -> bool:
+        self.cycle += 1
         activated = []
         for rule in self.rules:
             if self.check_all(rule['conditions']):
@@ -208,7 +263,7 @@ class RuleEngine:
 
         for rule in activated:
             for action in rule['actions']:
-                self.execute_action(action)
+                self.execute_action(action, rule['id'])
 
         return True
 
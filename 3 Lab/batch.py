@@ -0,0 +1,167 @@
+"""
+Пакетное определение архетипов без диалога (NumPy)
+
+Пример запуска:
+    python batch.py answers.csv -o archetypes.csv
+    python batch.py --bench 1000000
+
+Ответы передаются по столбцам: переменная вопроса (justice, planning,
+...) -> массив ответов yes/no (строки, bool или 0/1). Ответы каждой
+записи упаковываются в биты целого числа, а таблица "упакованные
+ответы -> архетип" строится заранее прогоном InferenceEngine по всем
+2^k сочетаниям, поэтому классификация - одна векторная выборка
+и совпадает с диалоговым выводом по той же сети.
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from inference_engine import InferenceEngine
+from semantic_network import SemanticNetwork
+from working_memory import WorkingMemory
+
+MAX_BITS = 24  # таблица на 2^24 записей - предел разумного
+YES = ("yes", "y", "да", "true", "1")
+NO = ("no", "n", "нет", "false", "0")
+
+
+class BatchClassifier:
+    """Таблица упакованных ответов -> архетип для одной сети"""
+
+    def __init__(self, network=None):
+        self.network = network or SemanticNetwork()
+        questions = [node for node in self.network.nodes.values() if node.type == "question"]
+        self.variables = tuple(dict.fromkeys(node.attrs["var"] for node in questions))
+        if len(self.variables) > MAX_BITS:
+            raise ValueError(f"Слишком много вопросов для таблицы: {len(self.variables)}")
+
+        # Прогон вывода по всем сочетаниям ответов: бит i - ответ "yes" на variables[i]
+        memory = WorkingMemory()
+        engine = InferenceEngine(self.network, memory)
+        names = {None: 0}
+        table = []
+        for code in range(1 << len(self.variables)):
+            memory.clear()
+            for bit, var in enumerate(self.variables):
+                memory.assert_fact(var, "yes" if code >> bit & 1 else "no")
+            table.append(names.setdefault(engine.infer_archetype(), len(names)))
+        self.table = np.array(table, dtype=np.uint8 if len(names) <= 256 else np.uint32)
+        # Номер результата -> имя архетипа; 0 - архетип не определён
+        self.names = np.array([name or "" for name in names], dtype=object)
+
+    def pack(self, records):
+        """Упаковывает столбцы ответов в массив кодов (бит на переменную)"""
+        columns = [_as_bool(_column(records, var), var) for var in self.variables]
+        codes = np.zeros(len(columns[0]), dtype=np.uint32)
+        for bit, column in enumerate(columns):
+            if len(column) != len(codes):
+                raise ValueError("Столбцы ответов разной длины")
+            codes |= column.astype(np.uint32) << bit
+        return codes
+
+    def classify(self, records, codes=False):
+        """Архетипы записей; codes=True - номера в self.names вместо имён"""
+        result = self.table[self.pack(records)]
+        return result if codes else self.names[result]
+
+
+def _column(records, var):
+    """Столбец переменной из словаря столбцов или структурированного массива"""
+    if isinstance(records, np.ndarray) and records.dtype.names is None:
+        raise ValueError("Ожидается словарь столбцов или структурированный массив")
+    try:
+        return records[var]
+    except (KeyError, ValueError):
+        raise ValueError(f"Нет столбца ответов {var}") from None
+
+
+def _as_bool(column, var):
+    """yes/no, да/нет, y/n, bool или 0/1 -> массив bool; иное - ValueError"""
+    column = np.asarray(column)
+    if column.dtype.kind == "b":
+        return column
+    if column.dtype.kind in "iuf":
+        values = column == 1
+        valid = values | (column == 0)
+    else:
+        text = np.char.lower(np.char.strip(column.astype(str)))
+        values = np.isin(text, YES)
+        valid = values | np.isin(text, NO)
+    if not valid.all():
+        row = int(np.argmin(valid))
+        raise ValueError(f"Недопустимый ответ на {var} в записи {row}: {column.tolist()[row]!r}")
+    return values
+
+
+_default = None
+
+
+def classify_batch(records, network=None, codes=False):
+    """Определяет архетипы для многих записей ответов сразу
+
+    records - столбцы ответов: {"justice": [...], "planning": [...], ...}
+    или структурированный массив NumPy с такими полями. Возвращает
+    массив имён архетипов ("" - архетип не определён).
+    """
+    global _default
+    if network is not None:
+        return BatchClassifier(network).classify(records, codes)
+    if _default is None:
+        _default = BatchClassifier()
+    return _default.classify(records, codes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетное определение архетипов")
+    parser.add_argument("input", nargs="?", help="CSV со столбцами ответов")
+    parser.add_argument("-o", "--output", default="-", help="CSV результата")
+    parser.add_argument("--graph", default=None, help="файл графа сети")
+    parser.add_argument("--bench", type=int, default=0, help="прогнать N случайных записей")
+    args = parser.parse_args()
+
+    network = SemanticNetwork(args.graph) if args.graph else None
+    classifier = BatchClassifier(network)
+
+    if args.bench:
+        rng = np.random.default_rng(0)
+        records = {var: rng.integers(0, 2, args.bench, dtype=np.uint8) for var in classifier.variables}
+        start = time.perf_counter()
+        result = classifier.classify(records, codes=True)
+        elapsed = time.perf_counter() - start
+        counts = np.bincount(result, minlength=len(classifier.names))
+        print(f"{args.bench} записей за {elapsed:.3f} с", file=sys.stderr)
+        for name, count in zip(classifier.names, counts):
+            if name:
+                print(f"  {name}: {count}", file=sys.stderr)
+        return
+
+    if not args.input:
+        parser.error("нужен CSV с ответами или --bench N")
+    with open(args.input, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    missing = [var for var in classifier.variables if var not in (reader.fieldnames or ())]
+    if missing:
+        parser.error(f"Нет столбцов ответов: {', '.join(missing)}")
+    records = {var: [row[var] for row in rows] for var in classifier.variables}
+    try:
+        result = classifier.classify(records)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["archetype"])
+        writer.writerows([name] for name in result)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
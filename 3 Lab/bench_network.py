@@ -0,0 +1,88 @@
+"""
+Бенчмарк памяти: узлы-объекты (SemanticNetwork) против CSR (CompactSemanticNetwork)
+
+Пример запуска:
+    python bench_network.py --nodes 100000 1000000 --branching 4
+
+Строится синтетическая таксономия: дерево с заданным ветвлением по
+связи is_a и по одной связи related на узел. Граф загружается один раз
+(GraphData), затем каждая сеть строится из него: один раз для замера
+времени и ещё раз под tracemalloc; в отчёт идут байты сети без общих
+данных графа.
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from compact_network import CompactSemanticNetwork
+from graph_loader import GraphData
+from semantic_network import SemanticNetwork
+
+BACKENDS = {
+    "objects": SemanticNetwork,
+    "csr": CompactSemanticNetwork,
+}
+
+
+def synthetic_graph(nodes, branching=4, seed=0):
+    """Дерево is_a из nodes узлов и случайные связи related"""
+    rnd = random.Random(seed)
+    graph = GraphData()
+    graph.add_node("n0", "class")
+    for i in range(1, nodes):
+        graph.add_node(f"n{i}", "class" if i * branching < nodes else "instance")
+        graph.add_edge(f"n{i}", "is_a", f"n{(i - 1) // branching}")
+        graph.add_edge(f"n{i}", "related", f"n{rnd.randrange(nodes)}")
+    return graph
+
+
+def measure(backend, graph):
+    """Время построения сети, затем её память (без памяти самого графа)
+    отдельным прогоном под tracemalloc"""
+    gc.collect()
+    start = time.perf_counter()
+    network = BACKENDS[backend](graph)
+    elapsed = time.perf_counter() - start
+    del network
+
+    gc.collect()
+    tracemalloc.start()
+    network = BACKENDS[backend](graph)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Проверка обхода: путь от листа к корню
+    node = network.get_node(graph.names[-1])
+    depth = 0
+    parents = node.follow("is_a")
+    while parents:
+        node = parents[0]
+        parents = node.follow("is_a")
+        depth += 1
+    del network
+    return {"bytes": current, "peak": peak, "seconds": elapsed, "depth": depth}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память представлений семантической сети")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--branching", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for nodes in args.nodes:
+        graph = synthetic_graph(nodes, args.branching, args.seed)
+        edges = len(graph.src)
+        for backend in BACKENDS:
+            r = measure(backend, graph)
+            print(f"{backend:>8} {nodes:>9} узлов {edges:>9} рёбер: "
+                  f"{r['bytes'] / 2**20:8.1f} МБ ({r['bytes'] / edges:6.1f} Б/ребро), "
+                  f"пик {r['peak'] / 2**20:8.1f} МБ, построение {r['seconds']:.2f} с, "
+                  f"глубина {r['depth']}")
+
+
+if __name__ == "__main__":
+    main()
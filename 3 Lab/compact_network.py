@@ -0,0 +1,147 @@
+"""
+Компактное представление семантической сети (CSR)
+
+Рёбра каждого типа связи хранятся в формате compressed sparse row:
+массив смещений по номерам узлов и массив номеров целевых узлов
+(модуль array). Объекты узлов не создаются заранее: get_node и
+обход связей возвращают лёгкие представления NodeView с __slots__,
+у которых те же name, type, attrs и links, что у Node.
+"""
+
+from array import array
+from itertools import accumulate
+from collections.abc import Mapping
+
+from graph_loader import GraphData, load_graph
+from semantic_network import DEFAULT_GRAPH
+
+
+def _index_type(n):
+    """Код типа array, в который помещаются номера до n"""
+    return "i" if n < 2 ** 31 else "q"
+
+
+class CSRRelation:
+    """Рёбра одного типа связи: targets[offsets[i]:offsets[i + 1]] - соседи узла i"""
+
+    __slots__ = ("offsets", "targets")
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    def neighbors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def degree(self, node):
+        return self.offsets[node + 1] - self.offsets[node]
+
+
+def build_csr(graph):
+    """Строит CSR по каждому типу связи; порядок рёбер узла сохраняется"""
+    n = len(graph.names)
+    code = _index_type(max(n, len(graph.src)) + 1)
+    counts = [array(code, [0]) * n for _ in graph.relations]
+
+    # Подсчёт исходящих рёбер, затем префиксные суммы - смещения
+    for src, rel in zip(graph.src, graph.rel):
+        counts[rel][src] += 1
+    offsets = [array(code, accumulate(c, initial=0)) for c in counts]
+    del counts
+
+    targets = [array(code, [0]) * off[n] for off in offsets]
+    fill = [array(code, off) for off in offsets]
+    for src, rel, dst in zip(graph.src, graph.rel, graph.dst):
+        pos = fill[rel]
+        targets[rel][pos[src]] = dst
+        pos[src] += 1
+
+    return {name: CSRRelation(off, tgt)
+            for name, off, tgt in zip(graph.relations, offsets, targets)}
+
+
+class NodeView:
+    """Узел компактной сети; создаётся по запросу и хранит только номер"""
+
+    __slots__ = ("network", "id")
+
+    def __init__(self, network, id):
+        self.network = network
+        self.id = id
+
+    @property
+    def name(self):
+        return self.network.names[self.id]
+
+    @property
+    def type(self):
+        return self.network.types[self.id]
+
+    @property
+    def attrs(self):
+        return self.network.attrs[self.id] or {}
+
+    @property
+    def links(self):
+        """Связи узла: тип_связи -> [узлы], как у Node"""
+        links = {}
+        for rel_type, relation in self.network.relations.items():
+            targets = relation.neighbors(self.id)
+            if targets:
+                links[rel_type] = [NodeView(self.network, t) for t in targets]
+        return links
+
+    def follow(self, rel_type):
+        """Узлы по связи rel_type (без построения всего словаря links)"""
+        relation = self.network.relations.get(rel_type)
+        if relation is None:
+            return []
+        return [NodeView(self.network, t) for t in relation.neighbors(self.id)]
+
+    def link(self, rel_type, target):
+        raise TypeError("Компактная сеть только для чтения")
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.network is self.network and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"{self.name}({self.type})"
+
+
+class _NodeTable(Mapping):
+    """nodes компактной сети: имя -> NodeView, представления создаются при обращении"""
+
+    __slots__ = ("network",)
+
+    def __init__(self, network):
+        self.network = network
+
+    def __getitem__(self, name):
+        return NodeView(self.network, self.network.ids[name])
+
+    def __iter__(self):
+        return iter(self.network.names)
+
+    def __len__(self):
+        return len(self.network.names)
+
+
+class CompactSemanticNetwork:
+    """Семантическая сеть с рёбрами в CSR-массивах; API как у SemanticNetwork"""
+
+    def __init__(self, source=None):
+        graph = source if isinstance(source, GraphData) else load_graph(source or DEFAULT_GRAPH)
+        self.names = graph.names
+        self.ids = graph.ids
+        self.types = graph.types
+        self.attrs = graph.attrs
+        self.relations = build_csr(graph)
+        self.nodes = _NodeTable(self)
+
+    def get_node(self, name):
+        """Возвращает узел по имени"""
+        node = self.ids.get(name)
+        return NodeView(self, node) if node is not None else None
@@ -0,0 +1,212 @@
+"""
+Фреймы поверх семантической сети: наследование слотов по is_a / part_of
+
+Слоты фрейма - атрибуты узла (attrs). Если у узла слота нет, он
+наследуется по связям иерархии (по умолчанию is_a, затем part_of):
+берётся значение ближайшего предка, у которого слот задан; из предков
+на одном расстоянии - первого по порядку связей.
+
+Иерархия индексируется один раз при создании FrameIndex:
+  - узлы упорядочиваются топологически (родители раньше детей), цикл -
+    ошибка;
+  - если у каждого узла не больше одного родителя (лес), узлы получают
+    интервальные метки обхода в глубину: проверка "a - предок b" - два
+    сравнения, потомки узла - непрерывный отрезок порядка обхода;
+  - при множественном наследовании для каждого узла хранится
+    транзитивное замыкание - кортеж предков от ближних к дальним и
+    множество для проверки за O(1).
+Владелец слота (узел, у которого он задан) вычисляется для всех узлов
+сразу при первом запросе этого слота и кэшируется, так что get_slot
+на любой глубине - обращение к массиву.
+"""
+
+from array import array
+from collections import deque
+
+HIERARCHY = ("is_a", "part_of")
+_MISSING = object()
+
+
+class FrameIndex:
+    """Индекс иерархии фреймов семантической сети"""
+
+    def __init__(self, network, relations=HIERARCHY):
+        self.network = network
+        self.relations = tuple(relations)
+        self.names = list(network.nodes)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+
+        # Родители и дети по связям иерархии (номера узлов)
+        self.attrs = []
+        self.parents = []
+        self.children = [[] for _ in range(n)]
+        for i, node in enumerate(network.nodes.values()):
+            self.attrs.append(node.attrs)
+            parents = []
+            for rel in self.relations:
+                for target in node.follow(rel):
+                    parent = self.ids[target.name]
+                    if parent not in parents:
+                        parents.append(parent)
+                        self.children[parent].append(i)
+            self.parents.append(tuple(parents))
+
+        self.order = self._topological_order()
+        self.is_forest = all(len(p) <= 1 for p in self.parents)
+        if self.is_forest:
+            self._label_intervals()
+        else:
+            self._build_closure()
+        self._owners = {}  # слот -> массив номеров узлов-владельцев
+
+    def _topological_order(self):
+        """Порядок узлов: родители раньше детей; ValueError при цикле"""
+        pending = [len(p) for p in self.parents]
+        queue = deque(i for i, count in enumerate(pending) if count == 0)
+        order = array("l")
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in self.children[node]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    queue.append(child)
+        if len(order) != len(self.names):
+            cyclic = next(self.names[i] for i, count in enumerate(pending) if count)
+            raise ValueError(f"Цикл в иерархии {'/'.join(self.relations)} через узел {cyclic}")
+        return order
+
+    def _label_intervals(self):
+        """Метки обхода в глубину: потомки узла i - preorder[pre[i] + 1:pre[i] + size[i]]"""
+        n = len(self.names)
+        self.pre = array("l", [0]) * n
+        self.size = array("l", [1]) * n
+        self.preorder = array("l")
+        for root in (i for i in range(n) if not self.parents[i]):
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                self.pre[node] = len(self.preorder)
+                self.preorder.append(node)
+                stack.extend(reversed(self.children[node]))
+        # Размеры поддеревьев: дети позже родителей в топологическом порядке
+        for node in reversed(self.order):
+            if self.parents[node]:
+                self.size[self.parents[node][0]] += self.size[node]
+
+    def _build_closure(self):
+        """Предки каждого узла от ближних к дальним (обход в ширину по родителям)"""
+        self.closure = [()] * len(self.names)
+        self.closure_sets = [frozenset()] * len(self.names)
+        for node in self.order:
+            seen = {}
+            level = self.parents[node]
+            while level:
+                next_level = []
+                for ancestor in level:
+                    if ancestor not in seen:
+                        seen[ancestor] = None
+                        next_level.extend(self.parents[ancestor])
+                level = next_level
+            self.closure[node] = tuple(seen)
+            self.closure_sets[node] = frozenset(seen)
+
+    def _id(self, node):
+        """Номер узла по имени или по объекту узла"""
+        name = node if isinstance(node, str) else node.name
+        if name not in self.ids:
+            raise KeyError(f"Нет узла {name}")
+        return self.ids[name]
+
+    def _ancestor_ids(self, node):
+        if not self.is_forest:
+            return self.closure[node]
+        out = []
+        while self.parents[node]:
+            node = self.parents[node][0]
+            out.append(node)
+        return out
+
+    def ancestors(self, node):
+        """Имена всех предков узла, от ближних к дальним"""
+        return [self.names[i] for i in self._ancestor_ids(self._id(node))]
+
+    def is_a(self, node, cls):
+        """Является ли cls предком node (транзитивно) - за O(1)"""
+        node, cls = self._id(node), self._id(cls)
+        if node == cls:
+            return False
+        if self.is_forest:
+            return self.pre[cls] < self.pre[node] < self.pre[cls] + self.size[cls]
+        return cls in self.closure_sets[node]
+
+    def instances_of(self, cls, type=None):
+        """Имена всех потомков cls; type - оставить только узлы этого типа"""
+        cls = self._id(cls)
+        if self.is_forest:
+            start = self.pre[cls] + 1
+            found = self.preorder[start:start + self.size[cls] - 1]
+        else:
+            seen = set()
+            found = []
+            queue = deque(self.children[cls])
+            while queue:
+                node = queue.popleft()
+                if node not in seen:
+                    seen.add(node)
+                    found.append(node)
+                    queue.extend(self.children[node])
+        names = (self.names[i] for i in found)
+        if type is None:
+            return list(names)
+        return [name for name in names if self.network.nodes[name].type == type]
+
+    def _owner(self, slot):
+        """Для каждого узла - номер узла, от которого берётся слот (-1 - нигде)"""
+        owners = self._owners.get(slot)
+        if owners is None:
+            owners = array("l", [-1]) * len(self.names)
+            attrs = self.attrs
+            for node in self.order:
+                if slot in attrs[node]:
+                    owners[node] = node
+                elif self.is_forest:
+                    # Единственный родитель уже знает своего владельца
+                    if self.parents[node]:
+                        owners[node] = owners[self.parents[node][0]]
+                else:
+                    # Владелец родителя может быть дальше другого предка:
+                    # ищем по замыканию от ближних к дальним
+                    for ancestor in self.closure[node]:
+                        if slot in attrs[ancestor]:
+                            owners[node] = ancestor
+                            break
+            self._owners[slot] = owners
+        return owners
+
+    def slot_owner(self, node, slot):
+        """Имя узла, у которого задан слот для node, или None"""
+        owner = self._owner(slot)[self._id(node)]
+        return self.names[owner] if owner >= 0 else None
+
+    def get_slot(self, node, slot, default=_MISSING):
+        """Значение слота с наследованием; KeyError, если его нет и default не задан"""
+        owner = self._owner(slot)[self._id(node)]
+        if owner >= 0:
+            return self.attrs[owner][slot]
+        if default is _MISSING:
+            raise KeyError(f"У фрейма {node if isinstance(node, str) else node.name} нет слота {slot}")
+        return default
+
+    def frame(self, node):
+        """Все слоты узла с учётом наследования (ближние значения важнее)"""
+        node = self._id(node)
+        names = set()
+        for i in [node, *self._ancestor_ids(node)]:
+            names.update(self.attrs[i])
+        slots = {}
+        for slot in sorted(names):
+            owner = self._owner(slot)[node]
+            slots[slot] = self.attrs[owner][slot]
+        return slots
@@ -0,0 +1,281 @@
+"""
+Загрузка графа семантической сети из файлов DOT, JSON и CSV
+
+Граф собирается пакетно: имена узлов получают целочисленные номера
+(таблица имя -> номер), а рёбра хранятся тремя массивами array
+(откуда, тип связи, куда). По этим данным SemanticNetwork строит
+узлы, поэтому размер сети ограничен только памятью, а не кодом.
+
+Форматы:
+  JSON - {"nodes": [{"name", "type", ...атрибуты}], "edges": [[откуда, связь, куда], ...]}
+  CSV  - рёбра "source,relation,target" с заголовком; узлы (если нужны
+         тип и атрибуты) - в файле <имя>.nodes.csv: "name,type,атрибуты..."
+  DOT  - digraph как в CodGraph.txt; тип связи - атрибут rel или первая
+         строка label, тип узла - атрибут type
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+from array import array
+
+DEFAULT_TYPE = "node"
+DEFAULT_RELATION = "link"
+EDGE_OPS = (("op", "->"), ("op", "--"))
+
+# Атрибуты оформления DOT, которые не относятся к знаниям
+DOT_STYLE = {"shape", "style", "fillcolor", "color", "fontname", "fontsize", "fontcolor",
+             "width", "height", "penwidth", "pos", "rankdir", "size", "arrowhead"}
+
+
+class GraphData:
+    """Граф в виде таблицы узлов и массивов рёбер"""
+
+    def __init__(self):
+        self.names = []  # номер -> имя
+        self.ids = {}  # имя -> номер
+        self.types = []  # номер -> тип узла
+        self.attrs = []  # номер -> словарь атрибутов или None
+        self.relations = []  # номер связи -> тип связи
+        self.rel_ids = {}
+        self.src = array("l")
+        self.rel = array("l")
+        self.dst = array("l")
+
+    def node_id(self, name):
+        """Номер узла; неизвестное имя добавляется с типом по умолчанию"""
+        node = self.ids.get(name)
+        if node is None:
+            node = len(self.names)
+            name = sys.intern(name)
+            self.ids[name] = node
+            self.names.append(name)
+            self.types.append(DEFAULT_TYPE)
+            self.attrs.append(None)
+        return node
+
+    def add_node(self, name, type=None, attrs=None):
+        """Добавляет узел или дополняет уже упомянутый"""
+        node = self.node_id(name)
+        if type:
+            self.types[node] = sys.intern(type)
+        if attrs:
+            if self.attrs[node] is None:
+                self.attrs[node] = {}
+            self.attrs[node].update(attrs)
+        return node
+
+    def relation_id(self, relation):
+        rel = self.rel_ids.get(relation)
+        if rel is None:
+            rel = len(self.relations)
+            self.rel_ids[relation] = rel
+            self.relations.append(sys.intern(relation))
+        return rel
+
+    def add_edge(self, source, relation, target):
+        """Добавляет ребро source -relation-> target"""
+        self.src.append(self.node_id(source))
+        self.rel.append(self.relation_id(relation))
+        self.dst.append(self.node_id(target))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"GraphData({len(self.names)} узлов, {len(self.src)} рёбер)"
+
+
+def load_json(path):
+    """Граф из JSON-файла"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    graph = GraphData()
+    for node in data.get("nodes", []):
+        attrs = {k: v for k, v in node.items() if k not in ("name", "type")}
+        graph.add_node(node["name"], node.get("type"), attrs)
+    for source, relation, target in data.get("edges", []):
+        graph.add_edge(source, relation, target)
+    return graph
+
+
+def load_csv(path):
+    """Граф из CSV: рёбра в path, узлы - в <имя>.nodes.csv рядом (если есть)"""
+    graph = GraphData()
+    nodes_path = os.path.splitext(path)[0] + ".nodes.csv"
+    if os.path.exists(nodes_path):
+        with open(nodes_path, encoding="utf-8", newline="") as f:
+            rows = csv.reader(f)
+            header = next(rows)
+            name_col = header.index("name")
+            type_col = header.index("type") if "type" in header else None
+            attr_cols = [(i, key) for i, key in enumerate(header) if i not in (name_col, type_col)]
+            for row in rows:
+                attrs = {key: row[i] for i, key in attr_cols if row[i]}
+                graph.add_node(row[name_col], row[type_col] if type_col is not None else None, attrs)
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows)
+        source, target = header.index("source"), header.index("target")
+        relation = header.index("relation") if "relation" in header else None
+        for row in rows:
+            rel = row[relation] if relation is not None else ""
+            graph.add_edge(row[source], rel or DEFAULT_RELATION, row[target])
+    return graph
+
+
+_DOT_TOKEN = re.compile(r"""
+    \s+ | //[^\n]* | /\*.*?\*/ | \#[^\n]*          # пробелы и комментарии
+  | (?P<str>"(?:[^"\\]|\\.)*")                    # строка в кавычках
+  | (?P<id>[\w.]+)                                # идентификатор или число
+  | (?P<op>->|--|[\[\]{}=,;:])
+""", re.VERBOSE | re.DOTALL)
+
+
+def _dot_tokens(text):
+    """Токены (вид, значение, номер строки)"""
+    pos = 0
+    line = 1
+    while pos < len(text):
+        m = _DOT_TOKEN.match(text, pos)
+        if m is None:
+            raise ValueError(f"DOT, строка {line}: неожиданный символ {text[pos]!r}")
+        start, pos = line, m.end()
+        line += text.count("\n", m.start(), pos)
+        if m.group("str") is not None:
+            value = m.group("str")[1:-1]
+            value = re.sub(r"\\([nlr])", "\n", value).replace('\\"', '"')
+            yield "id", value, start
+        elif m.group("id") is not None:
+            yield "id", m.group("id"), start
+        elif m.group("op") is not None:
+            yield "op", m.group("op"), start
+
+
+def _dot_attrs(tokens, i):
+    """Разбирает [a=b, ...] начиная с tokens[i] == '['; возвращает (словарь, позиция)"""
+    attrs = {}
+    i += 1
+    while tokens[i] != ("op", "]"):
+        key = tokens[i][1]
+        if tokens[i + 1] == ("op", "="):
+            attrs[key] = tokens[i + 2][1]
+            i += 3
+        else:
+            attrs[key] = "true"
+            i += 1
+        if tokens[i] in (("op", ","), ("op", ";")):
+            i += 1
+    return attrs, i + 1
+
+
+def _dot_group(tokens, i):
+    """Разбирает {a b c} начиная с tokens[i] == '{'; возвращает (имена, позиция)
+    или None, если внутри не только имена узлов (подграф с рёбрами и т.п.)"""
+    names = []
+    i += 1
+    while i < len(tokens) and tokens[i] != ("op", "}"):
+        kind, value = tokens[i]
+        if kind == "id" and value not in ("node", "edge", "graph", "subgraph"):
+            names.append(value)
+        elif tokens[i] not in (("op", ","), ("op", ";")):
+            return None
+        i += 1
+    if i == len(tokens):
+        return None
+    return names, i + 1
+
+
+def load_dot(path):
+    """Граф из файла DOT (подмножество: узлы, цепочки рёбер, умолчания node/edge)"""
+    with open(path, encoding="utf-8") as f:
+        scanned = list(_dot_tokens(f.read()))
+    tokens = [(kind, value) for kind, value, _ in scanned]
+    lines = [line for _, _, line in scanned]
+    graph = GraphData()
+    node_defaults = {}
+    edge_defaults = {}
+
+    i = 0
+    # Заголовок: [strict] (graph|digraph) [имя] {
+    while tokens[i] != ("op", "{"):
+        i += 1
+    i += 1
+    while i < len(tokens):
+        kind, value = tokens[i]
+        group = _dot_group(tokens, i) if tokens[i] == ("op", "{") else None
+        if group is not None and group[1] < len(tokens) and tokens[group[1]] in EDGE_OPS:
+            # Группа узлов - начало цепочки рёбер: {a b} -> c
+            chain = [group[0]]
+            i = group[1]
+        elif kind == "op":  # ; { } и вложенные подграфы разбираются как общий уровень
+            i += 1
+            continue
+        elif value in ("node", "edge", "graph") and tokens[i + 1] == ("op", "["):
+            attrs, i = _dot_attrs(tokens, i + 1)
+            if value == "node":
+                node_defaults.update(attrs)
+            elif value == "edge":
+                edge_defaults.update(attrs)
+            continue
+        elif value == "subgraph":
+            i += 1
+            if tokens[i][0] == "id":
+                i += 1
+            continue
+        elif tokens[i + 1] == ("op", "="):  # атрибут графа: rankdir=LR
+            i += 3
+            continue
+        else:
+            chain = [[value]]
+            i += 1
+
+        # Узел или цепочка рёбер a -> b -> {c d} [атрибуты]; группа
+        # в фигурных скобках - ребро к каждому её узлу
+        while i < len(tokens) and tokens[i] in EDGE_OPS:
+            line = lines[i]
+            i += 1
+            if i < len(tokens) and tokens[i][0] == "id":
+                chain.append([tokens[i][1]])
+                i += 1
+                continue
+            group = _dot_group(tokens, i) if i < len(tokens) and tokens[i] == ("op", "{") else None
+            if group is None:
+                raise ValueError(f"DOT, строка {line}: после ребра ожидается узел или группа {{a b}}")
+            chain.append(group[0])
+            i = group[1]
+        attrs = {}
+        if i < len(tokens) and tokens[i] == ("op", "["):
+            attrs, i = _dot_attrs(tokens, i)
+
+        if len(chain) == 1:
+            merged = dict(node_defaults, **attrs)
+            type = merged.pop("type", None)
+            graph.add_node(value, type, {k: v for k, v in merged.items() if k not in DOT_STYLE})
+        else:
+            merged = dict(edge_defaults, **attrs)
+            relation = merged.get("rel") or merged.get("label", DEFAULT_RELATION).split("\n")[0]
+            for sources, targets in zip(chain, chain[1:]):
+                for source in sources:
+                    for target in targets:
+                        graph.add_edge(source, relation, target)
+    return graph
+
+
+LOADERS = {
+    ".json": load_json,
+    ".csv": load_csv,
+    ".dot": load_dot,
+    ".gv": load_dot,
+    ".txt": load_dot,  # CodGraph.txt
+}
+
+
+def load_graph(path):
+    """Загружает граф; формат определяется по расширению файла"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in LOADERS:
+        raise ValueError(f"Неизвестный формат графа: {path}")
+    return LOADERS[ext](path)
@@ -3,96 +3,79 @@
 """
 
 class InferenceEngine:
-    """Механизм логического вывода"""
+    """Механизм логического вывода
 
-    def __init__(self, network, memory):
+    Вывод идёт по связям сети от курсора - текущего узла-вопроса: ответ
+    на вопрос (факт с именем его переменной var) переводит курсор по
+    связи с тем же именем ("yes"/"no"). Узел не-вопрос - результат.
+    Глубина и ветвление дерева берутся из данных сети. После очистки
+    памяти или изменения факта курсор возвращается к корню.
+
+    Тексты объяснений - тоже атрибуты узлов-вопросов: reason_<ответ> -
+    обоснование ответа, conclusion_<ответ> - промежуточный вывод.
+    """
+
+    def __init__(self, network, memory, root=None):
         self.network = network
         self.memory = memory
+        self.root = network.get_node(root) if root else self._find_root()
+        self.reset()
+
+    def _find_root(self):
+        """Вопрос, в который не ведёт ни одна связь от других вопросов"""
+        questions = [node for node in self.network.nodes.values() if node.type == "question"]
+        targets = set()
+        for node in questions:
+            for rel_targets in node.links.values():
+                targets.update(target.name for target in rel_targets)
+        for node in questions:
+            if node.name not in targets:
+                return node
+        return None
+
+    def reset(self):
+        """Возвращает курсор к корню дерева"""
+        self.cursor = self.root
+        self.revision = self.memory.revision
+
+    def _advance(self):
+        """Продвигает курсор по уже известным фактам"""
+        # Память очищена или факт изменён - проходим путь заново от корня
+        if self.memory.revision != self.revision:
+            self.reset()
+
+        node = self.cursor
+        while node is not None and node.type == "question":
+            answer = self.memory.get_fact(node.attrs["var"])
+            if answer is None:
+                break
+            targets = node.follow(answer)
+            node = targets[0] if targets else None
+        self.cursor = node
+        return node
 
     def infer_next_question(self):
         """Определяет следующий вопрос"""
-        if not self.memory.has_fact("justice"):
-            return self.network.get_node("q1")
-
-        justice = self.memory.get_fact("justice")
-
-        if justice == "yes":
-            if not self.memory.has_fact("planning"):
-                return self.network.get_node("q2_plan")
-
-            planning = self.memory.get_fact("planning")
-            if planning == "yes" and not self.memory.has_fact("detail"):
-                return self.network.get_node("q3_detail")
-            elif planning == "no" and not self.memory.has_fact("leader"):
-                return self.network.get_node("q3_leader")
-
-        else:  # justice == "no"
-            if not self.memory.has_fact("cooperation"):
-                return self.network.get_node("q2_coop")
-
-            coop = self.memory.get_fact("cooperation")
-            if coop == "yes" and not self.memory.has_fact("empathy"):
-                return self.network.get_node("q3_empathy")
-            elif coop == "no" and not self.memory.has_fact("imagination"):
-                return self.network.get_node("q3_imagine")
-
-        return None
+        node = self._advance()
+        return node if node is not None and node.type == "question" else None
 
     def get_answer_reasoning(self, question_node, answer):
         """Получает обоснование для ответа"""
-        var_name = question_node.attrs["var"]
-        answer_map = {
-            "justice": {
-                "yes": "Вы выбрали приоритет справедливости над гармонией",
-                "no": "Вы выбрали приоритет гармонии над справедливостью"
-            },
-            "planning": {
-                "yes": "Вы предпочитаете тщательное планирование",
-                "no": "Вы предпочитаете немедленные действия"
-            },
-            "cooperation": {
-                "yes": "Вы предпочитаете сотрудничество",
-                "no": "Вы предпочитаете творческие решения"
-            },
-            "detail": {
-                "yes": "Вы ориентированы на детали",
-                "no": "Вы видите общую картину"
-            },
-            "leader": {
-                "yes": "Вы прирожденный лидер",
-                "no": "Вы целеустремленный исполнитель"
-            },
-            "empathy": {
-                "yes": "У вас глубокая эмпатия",
-                "no": "У вас дипломатические навыки"
-            },
-            "imagination": {
-                "yes": "У вас богатое воображение",
-                "no": "У вас сильная интуиция"
-            }
-        }
-
-        return answer_map.get(var_name, {}).get(answer, "")
+        return question_node.attrs.get(f"reason_{answer}", "")
 
     def get_intermediate_conclusions(self):
-        """Получает промежуточные выводы"""
+        """Получает промежуточные выводы по пройденному пути"""
         conclusions = []
-        facts = self.memory.get_all_facts()
-
-        if "justice" in facts:
-            if facts["justice"] == "yes":
-                if "planning" in facts:
-                    if facts["planning"] == "yes":
-                        conclusions.append("→ Вы на ветви 'Справедливость' с подходом 'Планирование'")
-                    else:
-                        conclusions.append("→ Вы на ветви 'Справедливость' с подходом 'Действие'")
-            else:
-                if "cooperation" in facts:
-                    if facts["cooperation"] == "yes":
-                        conclusions.append("→ Вы на ветви 'Гармония' с подходом 'Сотрудничество'")
-                    else:
-                        conclusions.append("→ Вы на ветви 'Гармония' с подходом 'Творчество'")
-
+        node = self.root
+        while node is not None and node.type == "question":
+            answer = self.memory.get_fact(node.attrs["var"])
+            if answer is None:
+                break
+            conclusion = node.attrs.get(f"conclusion_{answer}")
+            if conclusion:
+                conclusions.append(f"→ {conclusion}")
+            targets = node.follow(answer)
+            node = targets[0] if targets else None
         return conclusions
 
     def process_answer(self, question_node, answer):
@@ -116,41 +99,5 @@ class InferenceEngine:
 
     def infer_archetype(self):
         """Определяет архетип на основе фактов"""
-        if not self.memory.has_fact("justice"):
-            return None
-
-        justice = self.memory.get_fact("justice")
-
-        if justice == "yes":
-            if not self.memory.has_fact("planning"):
-                return None
-            planning = self.memory.get_fact("planning")
-
-            if planning == "yes":
-                if not self.memory.has_fact("detail"):
-                    return None
-                detail = self.memory.get_fact("detail")
-                return "АРХИТЕКТОР" if detail == "yes" else "СТРАТЕГ"
-            else:
-                if not self.memory.has_fact("leader"):
-                    return None
-                leader = self.memory.get_fact("leader")
-                return "ЛИДЕР" if leader == "yes" else "ВОИН"
-
-        else:  # justice == "no"
-            if not self.memory.has_fact("cooperation"):
-                return None
-            coop = self.memory.get_fact("cooperation")
-
-            if coop == "yes":
-                if not self.memory.has_fact("empathy"):
-                    return None
-                empathy = self.memory.get_fact("empathy")
-                return "ОПЕКУН" if empathy == "yes" else "МИРОТВОРЕЦ"
-            else:
-                if not self.memory.has_fact("imagination"):
-                    return None
-                imagine = self.memory.get_fact("imagination")
-                return "ТВОРЕЦ" if imagine == "yes" else "ПРОВИДЕЦ"
-
-        return None
\ No newline at end of file
+        node = self._advance()
+        return node.name if node is not None and node.type != "question" else None
\ No newline at end of file
@@ -2,6 +2,8 @@
 Главный модуль системы определения архетипов личности
 """
 
+import sys
+
 from semantic_network import SemanticNetwork
 from working_memory import WorkingMemory
 from inference_engine import InferenceEngine
@@ -11,9 +13,16 @@ from interface import Interface
 def main():
     """Основная функция"""
     # Инициализация компонентов
-    network = SemanticNetwork()
+    # Граф сети можно передать аргументом: python main.py graph.dot
+    network = SemanticNetwork(sys.argv[1] if len(sys.argv) > 1 else None)
     memory = WorkingMemory()
     engine = InferenceEngine(network, memory)
+    if engine.root is None:
+        # Без узлов-вопросов диалогу не с чего начать (например, CodGraph.txt -
+        # только схема архетипов, без атрибутов type="question")
+        print(f"Ошибка: в графе {sys.argv[1] if len(sys.argv) > 1 else 'по умолчанию'} "
+              f"нет корневого вопроса (узлов с type=question)", file=sys.stderr)
+        sys.exit(1)
     ui = Interface(engine)
 
     # Запуск системы
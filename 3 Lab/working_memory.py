@@ -9,9 +9,12 @@ class WorkingMemory:
         self.facts = {}
         self.history = []
         self.reasoning_chain = []
+        self.revision = 0  # растёт, когда факт удалён или изменён
 
     def assert_fact(self, variable, value, reason=None):
         """Добавляет факт с обоснованием"""
+        if variable in self.facts and self.facts[variable] != value:
+            self.revision += 1
         self.facts[variable] = value
         self.history.append((variable, value))
         if reason:
@@ -21,6 +24,7 @@ class WorkingMemory:
         """Удаляет факт"""
         if variable in self.facts:
             del self.facts[variable]
+            self.revision += 1
 
     def get_fact(self, variable):
         """Получает значение факта"""
@@ -35,6 +39,7 @@ class WorkingMemory:
         self.facts.clear()
         self.history.clear()
         self.reasoning_chain.clear()
+        self.revision += 1
 
     def get_all_facts(self):
         """Возвращает все факты"""